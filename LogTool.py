@@ -1,381 +1,2440 @@
-import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog, ttk
+import argparse
+import atexit
 import csv
+import gc
+import glob
+import gzip
+import hashlib
+import io
+import json
+import locale
+import lzma
+import os
+import pickle
+import queue
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import chain, islice
+from operator import attrgetter
 import configparser
+from sys import intern
+from urllib.parse import unquote, urlsplit
+
+# NumPy ist optional und wird erst in numpy_backend() geladen (None = noch nicht versucht, False = nicht installiert)
+np = None
+
+ACP_ENCODING = locale.getpreferredencoding(False)
+# Kleinere Dateien sind sequentiell schneller als mit dem Start eines Prozess-Pools
+PARALLEL_MIN_BYTES = 8 << 20
+# Alle wie viele Accounts/Socialclubs beim Auswerten Fortschritt gemeldet und auf Abbruch geprüft wird
+EVALUATE_REPORT_EVERY = 10000
+# Auswahl für den Zeitraum in der GUI, in Tagen (0 = alle Daten)
+WINDOW_CHOICES = (0, 7, 30, 90, 365)
+
+# tkinter wird erst in load_tk() geladen, damit der Headless-Modus ohne Display läuft
+tk = messagebox = simpledialog = filedialog = ttk = None
 
 config = configparser.ConfigParser()
-config_file = 'config.ini'
+database = None
+action_log = None
+submitted = None
+rules = None
+# Laufender Reload der GUI (Worker-Thread und Abbruch-Signal)
+reload_thread = None
+reload_cancel = None
+
+def load_config(config_file='config.ini'):
+    if not config.read(config_file):
+        config['DEFAULT'] = {
+            'LogFilePath': 'sanktionen_log.txt',
+            'DefaultExportPath': 'sanktionen_output.csv',
+            'ParserWorkers': '1',
+            'SnapshotCache': 'yes',
+            'SnapshotMaxMB': '1024',
+            'DatabasePath': '',
+            'LogMaxMB': '10',
+            'LogRotateDaily': 'no',
+            'LogBackupCount': '5',
+            'Metrics': 'no',
+            'MetricsFile': '',
+            'RulesFile': 'rules.ini',
+            'SanctionBackend': 'auto',
+            'WindowDays': '0',
+            'SubmittedFile': 'submitted_sanctions.bin',
+            'DeltaMode': 'no',
+            'ServeAddress': '127.0.0.1:8765',
+            'ServeReloadSeconds': '60'
+        }
+        with open(config_file, 'w') as file:
+            config.write(file)
+
+def load_tk():
+    global tk, messagebox, simpledialog, filedialog, ttk
+    import tkinter as tk
+    from tkinter import messagebox, simpledialog, filedialog, ttk
+
+class Account:
+    # Kompakter Datensatz pro Login-Zeile; __slots__ spart das Instanz-Dict
+    __slots__ = ('username', 'account_id', 'socialclub', 'login_date', 'first_login_page', 'total_logins')
+
+    def __init__(self, username, account_id, socialclub, login_date, first_login_page, total_logins):
+        self.username = username
+        self.account_id = account_id
+        self.socialclub = socialclub
+        self.login_date = login_date
+        self.first_login_page = first_login_page
+        self.total_logins = total_logins
+
+    def __reduce__(self):
+        # Kompakte Serialisierung für die Snapshots, ohne Zustands-Dict pro Objekt
+        return (Account, (self.username, self.account_id, self.socialclub, self.login_date, self.first_login_page, self.total_logins))
+
+    def __repr__(self):
+        return f"Account({self.username!r}, {self.account_id!r}, {self.socialclub!r}, {self.login_date!r}, {self.total_logins})"
+
+def split_acp_line(line):
+    parts = line.split()
+    if len(parts) < 11:
+        return None
+    total_logins = parts[-1].strip('Total Logins:').strip(')')
+    try:
+        total_logins = int(total_logins)
+    except ValueError:
+        total_logins = 0
+    return parts[0], parts[1], parts[3], parts[4] + ' ' + parts[5], parts[7].strip('Page:').strip('()'), total_logins
+
+# Login-Zeitpunkte kommen als "dd.mm.yyyy HH:MM:SS" oder "yyyy-mm-dd HH:MM:SS"
+LOGIN_DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d')
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+# Datumsteil -> Tage seit 1970 (None = nicht lesbar); es gibt nur wenige verschiedene Tage
+login_day_cache = {}
+
+def login_timestamp(login_date):
+    """Sekunden seit 1970 (lokale Zeit des Dumps) oder -1, wenn das Datum nicht lesbar ist."""
+    date_part = login_date[:10]
+    day = login_day_cache.get(date_part, -1)
+    if day == -1:
+        day = None
+        for date_format in LOGIN_DATE_FORMATS:
+            try:
+                day = datetime.strptime(date_part, date_format).toordinal() - EPOCH_ORDINAL
+                break
+            except ValueError:
+                pass
+        login_day_cache[date_part] = day
+    if day is None:
+        return -1
+    try:
+        return day * 86400 + int(login_date[11:13]) * 3600 + int(login_date[14:16]) * 60 + int(login_date[17:19])
+    except ValueError:
+        return day * 86400
+
+def add_acp_entry(seen_entries, username, account_id, socialclub, login_date, first_login_page, total_logins):
+    # Wiederkehrende Strings internieren, damit jede ID nur einmal im Speicher liegt
+    username = intern(username)
+    account_id = intern(account_id)
+    socialclub = intern(socialclub)
+    # Login-Zeitpunkte (mit Sekunden) sind fast immer verschieden, Internieren brächte nur Kosten
+    key = (username, account_id, socialclub, login_date)
+
+    entry = seen_entries.get(key)
+    if entry is not None:
+        if entry.total_logins != total_logins:
+            entry.total_logins += total_logins
+    else:
+        entry = seen_entries[key] = Account(
+            username,
+            account_id,
+            socialclub,
+            login_date,
+            intern(first_login_page),
+            total_logins
+        )
+    return entry
+
+def parse_acp_line(line, seen_entries):
+    fields = split_acp_line(line)
+    if fields is None:
+        return None
+    return add_acp_entry(seen_entries, *fields)
+
+def parse_acp_lines(lines, seen_entries=None):
+    # Zeilen einzeln verarbeiten, damit nie die ganze Datei im Speicher liegt
+    if seen_entries is None:
+        seen_entries = {}
+    entry_count = len(seen_entries)
+    lines_read = lines_skipped = 0
+    for line in lines:
+        lines_read += 1
+        if parse_acp_line(line, seen_entries) is None:
+            lines_skipped += 1
+    metrics.count_parsed(lines_read, lines_skipped, len(seen_entries) - entry_count)
+    return seen_entries
+
+def parse_acp_data(data):
+    with gc_paused():
+        return list(parse_acp_lines(io.StringIO(data)).values())
+
+@contextmanager
+def gc_paused():
+    # Beim Anlegen von Millionen Account-Objekten läuft sonst ständig die zyklische Garbage Collection
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def peak_memory_mb():
+    # Höchststand des Arbeitsspeichers des ganzen Prozesses; None, wenn das Betriebssystem ihn nicht liefert
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux meldet KB, macOS Bytes
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1 << 20)
+    return None
+
+class RunMetrics:
+    """
+    Laufzeiten pro Verarbeitungsschritt, Zähler und Speicher-Höchststand eines Laufs.
+    Ausgeschaltet (Metrics = no) kosten stage() und count() nur einen Funktionsaufruf.
+    """
 
-if not config.read(config_file):
-    config['DEFAULT'] = {
-        'LogFilePath': 'sanktionen_log.txt',
-        'DefaultExportPath': 'sanktionen_output.csv'
+    STAGE_TITLES = {
+        'snapshot_load': "Snapshot laden",
+        'read_parse': "Einlesen + Parsen",
+        'read': "  davon Datei lesen",
+        'group': "Gruppieren",
+        'check_sanctions': "Prüfung §1.1/§1.4",
+        'combined': "Kombinierte Sanktionen",
+        'window': "Zeitraum auswerten",
+        'delta': "Abgleich mit abgeschickten Sanktionen",
+        'results': "Ergebnis aufbereiten",
+        'snapshot_save': "Snapshot speichern",
+        'database': "Datenbank",
+        'refresh_gui': "GUI aufbauen",
+        'export': "Export",
+    }
+    COUNTER_TITLES = {
+        'lines_read': "Gelesene Zeilen",
+        'lines_skipped': "Übersprungen (< 11 Tokens)",
+        'duplicates_merged': "Zusammengeführte Dubletten",
+        'sanctions_1_1': "Sanktionen §1.1",
+        'sanctions_1_4': "Sanktionen §1.4",
+        'sanctions_combined': "Sanktionen kombiniert",
     }
-    with open(config_file, 'w') as file:
-        config.write(file)
 
-def parse_acp_data(data):
-    accounts = []
-    seen_entries = {}
-    
-    for line in data.strip().split('\n'):
-        parts = line.split()
-        if len(parts) < 11:
-            continue
-        total_logins = parts[-1].strip('Total Logins:').strip(')')
+    def __init__(self):
+        self.enabled = False
+        self.file_path = ''
+        self.last = None
+        self.reset()
+
+    def reset(self):
+        self.started = datetime.now()
+        self.stages = {}
+        self.counters = {}
+        # Höchststand des ganzen Prozesses nach dem Schritt, kein Verbrauch des Schritts selbst:
+        # nach dem speicherhungrigsten Schritt zeigen alle folgenden denselben Wert
+        self.process_peaks_after = {}
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        if self.enabled:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+            self.process_peaks_after[name] = peak_memory_mb()
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_parsed(self, lines_read, lines_skipped, new_entries):
+        if self.enabled:
+            self.count('lines_read', lines_read)
+            self.count('lines_skipped', lines_skipped)
+            self.count('duplicates_merged', lines_read - lines_skipped - new_entries)
+
+    def count_results(self, sanctions_1_1, sanctions_1_4, combined_sanctions):
+        if self.enabled:
+            self.counters['sanctions_1_1'] = len(sanctions_1_1)
+            self.counters['sanctions_1_4'] = sum(len(v) for v in sanctions_1_4.values())
+            self.counters['sanctions_combined'] = len(combined_sanctions)
+
+    def as_dict(self, context):
+        peak = peak_memory_mb()
+        return {
+            'context': context,
+            'started': self.started.isoformat(timespec='seconds'),
+            'stages_seconds': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'process_peak_memory_mb_after_stage': {
+                name: None if peak is None else round(peak, 1) for name, peak in self.process_peaks_after.items()
+            },
+            'counters': dict(self.counters),
+            'peak_memory_mb': None if peak is None else round(peak, 1),
+        }
+
+    def report(self, context):
+        """Schließt einen Lauf ab: ins Log schreiben, als JSON ablegen und für die Zusammenfassung merken."""
+        if not self.enabled:
+            return
+        self.last = self.as_dict(context)
+        stages = ', '.join(f"{name} {seconds:.3f}s" for name, seconds in self.last['stages_seconds'].items())
+        counters = ', '.join(f"{name}={value}" for name, value in self.last['counters'].items())
+        log_action(f"Messwerte ({context}): {stages}; {counters}; Speicher-Höchststand {self.last['peak_memory_mb']} MB")
+        if self.file_path:
+            try:
+                with open(self.file_path + '.tmp', 'w', encoding='utf-8') as file:
+                    json.dump(self.last, file, indent=2)
+                os.replace(self.file_path + '.tmp', self.file_path)
+            except OSError as e:
+                log_action(f"Messwerte konnten nicht gespeichert werden: {e}")
+        self.reset()
+
+    def summary_text(self):
+        if self.last is None:
+            return ""
+        lines = [f"Messwerte ({self.last['context']}, {self.last['started']}):"]
+        for name, seconds in self.last['stages_seconds'].items():
+            lines.append(f"{self.STAGE_TITLES.get(name, name)}: {seconds:.3f} s")
+        for name, value in self.last['counters'].items():
+            lines.append(f"{self.COUNTER_TITLES.get(name, name)}: {value}")
+        if self.last['peak_memory_mb'] is not None:
+            lines.append(f"Speicher-Höchststand: {self.last['peak_memory_mb']} MB")
+        return '\n'.join(lines)
+
+metrics = RunMetrics()
+
+def configure_metrics():
+    metrics.enabled = config['DEFAULT'].getboolean('Metrics', fallback=False)
+    metrics.file_path = config['DEFAULT'].get('MetricsFile', '')
+
+def numpy_backend():
+    # SanctionBackend = auto/numpy nutzt NumPy, falls installiert, python erzwingt den reinen Python-Pfad.
+    # Der Import erst hier hält den Start ohne Vollauswertung (z.B. --lookup) klein.
+    global np
+    if config['DEFAULT'].get('SanctionBackend', 'auto') not in ('auto', 'numpy'):
+        return False
+    if np is None:
         try:
-            total_logins = int(total_logins)
-        except ValueError:
-            total_logins = 0
+            import numpy
+            np = numpy
+        except ImportError:
+            np = False
+    return np is not False
+
+def parser_workers():
+    # ParserWorkers = 0 nutzt alle Kerne, 1 parst wie bisher in einem Prozess
+    workers = config['DEFAULT'].getint('ParserWorkers', 1)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def find_last_line_end(file, size):
+    # Position direkt hinter dem letzten Zeilenende; eine unvollständige letzte Zeile bleibt außen vor
+    pos = size
+    while pos > 0:
+        block_start = max(pos - 65536, 0)
+        file.seek(block_start)
+        newline = file.read(pos - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        pos = block_start
+    return 0
+
+def split_byte_ranges(file, start, end, parts):
+    # Bereichsgrenzen jeweils hinter das nächste Zeilenende schieben
+    bounds = [start]
+    step = max((end - start) // parts, 1)
+    for i in range(1, parts):
+        file.seek(max(start + i * step, bounds[-1]))
+        file.readline()
+        pos = min(file.tell(), end)
+        if pos > bounds[-1]:
+            bounds.append(pos)
+    if bounds[-1] < end:
+        bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+def parse_acp_range(file_path, start, end):
+    """
+    Worker für das parallele Einlesen: parst einen zeilengenauen Byte-Bereich.
+    Das Ergebnis ist spaltenweise (Liste pro Feld), damit es schnell zurück an den Hauptprozess geht.
+    Weitere Login-Werte eines Schlüssels landen in Dateireihenfolge in extra_logins,
+    damit das Zusammenführen exakt wie der sequentielle Parser summiert.
+    """
+    rows = {}
+    columns = ([], [], [], [], [], [])
+    extra_logins = {}
+    lines_skipped = 0
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    lines = data.decode(ACP_ENCODING, errors='replace').splitlines()
+    with gc_paused():
+        for line in lines:
+            fields = split_acp_line(line)
+            if fields is None:
+                lines_skipped += 1
+                continue
+            key = fields[:4]
+            row = rows.get(key)
+            if row is None:
+                rows[key] = len(columns[0])
+                # Interniert wird auch hier, damit gleiche Strings nur einmal übertragen werden
+                for column, value in zip(columns, fields[:5]):
+                    column.append(intern(value))
+                columns[5].append(fields[5])
+            else:
+                extra_logins.setdefault(row, []).append(fields[5])
+    return columns, extra_logins, len(lines), lines_skipped
+
+def merge_acp_entries(seen_entries, columns, extra_logins):
+    get_entry = seen_entries.get
+    for row, (username, account_id, socialclub, login_date, first_login_page, total_logins) in enumerate(zip(*columns)):
+        key = (intern(username), intern(account_id), intern(socialclub), login_date)
+        entry = get_entry(key)
+        if entry is None:
+            entry = seen_entries[key] = Account(key[0], key[1], key[2], key[3], intern(first_login_page), total_logins)
+        elif entry.total_logins != total_logins:
+            entry.total_logins += total_logins
+        if row in extra_logins:
+            for total_logins in extra_logins[row]:
+                if entry.total_logins != total_logins:
+                    entry.total_logins += total_logins
+
+def parse_acp_file_parallel(file_path, start, end, workers, seen_entries=None):
+    if seen_entries is None:
+        seen_entries = {}
+    with open(file_path, 'rb') as file:
+        # Mehr Bereiche als Prozesse, damit ungleich schnelle Bereiche sich ausgleichen
+        ranges = split_byte_ranges(file, start, end, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_acp_range, file_path, range_start, range_end) for range_start, range_end in ranges]
+        # In Dateireihenfolge zusammenführen, damit Reihenfolge und Login-Summen dem sequentiellen Lauf entsprechen
+        with gc_paused():
+            for future in futures:
+                columns, extra_logins, lines_read, lines_skipped = future.result()
+                entry_count = len(seen_entries)
+                merge_acp_entries(seen_entries, columns, extra_logins)
+                metrics.count_parsed(lines_read, lines_skipped, len(seen_entries) - entry_count)
+    return seen_entries
+
+def iter_acp_file(file_path):
+    """
+    Liest die ACP-Datei zeilenweise und liefert die deduplizierten Accounts als Generator.
+    Der Speicherbedarf entspricht damit in etwa der Größe von seen_entries.
+    Paralleles Einlesen (ParserWorkers) läuft ausschließlich über AcpIngestState.
+    """
+    with open(file_path, 'r', encoding=ACP_ENCODING) as file, gc_paused():
+        seen_entries = parse_acp_lines(file)
+    yield from seen_entries.values()
+
+class DisjointSet:
+    """Union-Find mit Pfadhalbierung und Vereinigung nach Größe (nahezu linear)."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}  # nur für Wurzeln
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        # Liefert (neue Wurzel, aufgegangene Wurzel); die zweite ist None, wenn beide schon verbunden waren
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a, None
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size.pop(root_b)
+        return root_a, root_b
+
+class ReloadCancelled(Exception):
+    """Wird ausgelöst, wenn ein laufendes Einlesen über das cancel_event abgebrochen wurde."""
+
+DEFAULT_RULES = """\
+# Regeln für LogTool. Jede Regel ist ein Abschnitt [Rule <Name>]:
+#   Title          Beschreibung, erscheint als "<Name> - <Title>" in der Spalte Regelverstoß
+#   Group          account (pro Account ID) oder socialclub (pro Socialclub)
+#   Count          bei account: socialclubs (verschiedene Socialclubs des Accounts)
+#                  bei socialclub: entries (Einträge) oder accounts (verschiedene Accounts)
+#   MinCount       ab dieser Anzahl liegt ein Verstoß vor
+#   RequireShared  nur bei account: mindestens ein Socialclub wird auch von einem anderen Account genutzt
+#   Sanction       Sanktion für alle betroffenen Accounts
+#   MainSanction   nur bei socialclub: abweichende Sanktion für den Account mit den meisten Logins
+#   ShowLogins     Logins an die Sanktion anhängen, z.B. "Permanenter Bann (Logins: 12)"
+#   Precedence     Reihenfolge in kombinierten Sanktionen (kleinere Werte zuerst)
+#
+# [Sanctions] legt die Priorität jeder Sanktion fest. Verstößt ein Account gegen mehrere Regeln,
+# gilt die Sanktion mit der höchsten Priorität.
+# [Levels] Bounds: Login-Grenzen der Level; unter der ersten Grenze Level 1, ab der letzten das höchste Level.
+
+[Sanctions]
+Permanenter Bann = 100
+Hauptaccount Bann 60 Tage = 60
+
+[Levels]
+Bounds = 10, 30, 51, 101
+
+[Rule §1.1]
+Title = Mehrere Social Clubs für einen Account
+Group = account
+Count = socialclubs
+MinCount = 2
+RequireShared = yes
+Sanction = Permanenter Bann
+ShowLogins = no
+Precedence = 1
+
+[Rule §1.4]
+Title = Mehrere Accounts mit einem Social Club
+Group = socialclub
+Count = entries
+MinCount = 3
+Sanction = Permanenter Bann
+MainSanction = Hauptaccount Bann 60 Tage
+ShowLogins = yes
+Precedence = 2
+"""
+
+class Rule:
+    """Eine Regel aus der Regeldatei; wird von SanctionIndex über die gemeinsamen Gruppierungs-Maps ausgewertet."""
+
+    COUNTS = {'account': ('socialclubs',), 'socialclub': ('entries', 'accounts')}
+
+    def __init__(self, name, section):
+        self.name = name
+        self.title = section.get('Title', '')
+        self.violation = f"{name} - {self.title}" if self.title else name
+        self.group = section.get('Group', '')
+        if self.group not in self.COUNTS:
+            raise ValueError(f"Regel {name}: Group muss account oder socialclub sein")
+        self.count = section.get('Count', self.COUNTS[self.group][0])
+        if self.count not in self.COUNTS[self.group]:
+            raise ValueError(f"Regel {name}: Count muss {' oder '.join(self.COUNTS[self.group])} sein")
+        self.min_count = section.getint('MinCount')
+        if self.min_count is None or self.min_count < 1:
+            raise ValueError(f"Regel {name}: MinCount fehlt oder ist kleiner als 1")
+        self.require_shared = section.getboolean('RequireShared', fallback=False)
+        self.sanction = section.get('Sanction')
+        self.main_sanction = section.get('MainSanction') if self.group == 'socialclub' else None
+        self.show_logins = section.getboolean('ShowLogins', fallback=False)
+        self.precedence = section.getint('Precedence', fallback=0)
+
+    def sanction_text(self, label, logins):
+        return f"{label} (Logins: {logins})" if self.show_logins else label
+
+    def key(self):
+        return (self.name, self.violation, self.group, self.count, self.min_count, self.require_shared,
+                self.sanction, self.main_sanction, self.show_logins, self.precedence)
+
+class RuleSet:
+    """
+    Alle Regeln samt Prioritätentabelle der Sanktionen und Level-Grenzen.
+    digest ändert sich mit jeder inhaltlichen Änderung und macht gespeicherte Auswertungen ungültig.
+    """
 
-        key = (parts[0], parts[1], parts[3], parts[4] + ' ' + parts[5])
+    def __init__(self, parser, source='Regeln'):
+        if not parser.has_section('Sanctions'):
+            raise ValueError(f"{source}: Abschnitt [Sanctions] fehlt")
+        self.priorities = {label: parser.getint('Sanctions', label) for label in parser.options('Sanctions')}
+        self.max_priority = max(self.priorities.values(), default=0)
+        bounds = parser.get('Levels', 'Bounds', fallback='')
+        self.level_bounds = sorted(int(bound) for bound in bounds.split(',') if bound.strip())
+
+        rules = []
+        for section in parser.sections():
+            if section.startswith('Rule '):
+                rule = Rule(section[len('Rule '):].strip(), parser[section])
+                for label in (rule.sanction, rule.main_sanction):
+                    if label is not None and label not in self.priorities:
+                        raise ValueError(f"{source}: Sanktion '{label}' der Regel {rule.name} fehlt in [Sanctions]")
+                if rule.sanction is None:
+                    raise ValueError(f"{source}: Regel {rule.name} hat keine Sanction")
+                rules.append(rule)
+        if not rules:
+            raise ValueError(f"{source}: keine Regeln definiert")
+        # sorted() ist stabil: bei gleicher Precedence bleibt die Reihenfolge der Datei
+        self.rules = sorted(rules, key=lambda rule: rule.precedence)
+        self.account_rules = [rule for rule in self.rules if rule.group == 'account']
+        self.socialclub_rules = [rule for rule in self.rules if rule.group == 'socialclub']
+        self.digest = hashlib.blake2b(repr((
+            sorted(self.priorities.items()), self.level_bounds, [rule.key() for rule in self.rules]
+        )).encode('utf-8'), digest_size=16).hexdigest()
+
+    def priority(self, label):
+        return self.priorities.get(label, 0)
+
+    def level(self, logins):
+        return f"Level {bisect_right(self.level_bounds, logins) + 1}"
+
+    def combine(self, hits):
+        """
+        Kombinierte Sanktion aus mehreren Treffern [(Regel, Sanktion), ...] in Precedence-Reihenfolge.
+        Es gilt die Sanktion mit der höchsten Priorität; Logins werden über die gleichrangigen Treffer summiert.
+        """
+        top = max(sanction['priority'] for _, sanction in hits)
+        top_hits = [(rule, sanction) for rule, sanction in hits if sanction['priority'] == top]
+        label = top_hits[0][1]['label']
+        login_hits = [sanction['total_logins'] for rule, sanction in top_hits if rule.show_logins]
+        text = f"{label} (Logins: {sum(login_hits)})" if login_hits else label
+        shown_logins = [sanction['total_logins'] for rule, sanction in hits if rule.show_logins]
+        total_logins = sum(shown_logins) if shown_logins else hits[0][1]['total_logins']
+        return text, label, top, total_logins
+
+    def section_names(self):
+        return (', '.join(rule.name for rule in self.account_rules),
+                ', '.join(rule.name for rule in self.socialclub_rules),
+                ' und '.join(rule.name for rule in self.rules))
+
+def parse_rules(text, source='Regeln'):
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str  # Sanktionsnamen mit Groß-/Kleinschreibung
+    parser.read_string(text, source)
+    return RuleSet(parser, source)
+
+def load_rules(rules_file='rules.ini'):
+    # Fehlt die Regeldatei, wird sie wie die config.ini mit den bisherigen Regeln §1.1/§1.4 angelegt
+    global rules
+    if not os.path.exists(rules_file):
+        with open(rules_file, 'w', encoding='utf-8') as file:
+            file.write(DEFAULT_RULES)
+    with open(rules_file, encoding='utf-8') as file:
+        rules = parse_rules(file.read(), rules_file)
+    return rules
+
+def active_rules():
+    global rules
+    if rules is None:
+        rules = parse_rules(DEFAULT_RULES)
+    return rules
+
+class SanctionIndex:
+    """
+    Gruppierungs-Maps und Sanktionsergebnisse aller Regeln (standardmäßig §1.1 und §1.4) und der Kombination.
+    Alle Regeln einer Gruppierung werden in einem Durchlauf über dieselben Maps ausgewertet.
+    Einzelne Account-IDs und Socialclubs lassen sich neu bewerten, ohne alles neu zu prüfen.
+    """
 
-        if key in seen_entries:
-            if seen_entries[key]['total_logins'] != total_logins:
-                seen_entries[key]['total_logins'] += total_logins
+    def __init__(self, rule_set=None):
+        self.account_info = {}  # account_id -> [Benutzername, Logins]
+        self.account_map = defaultdict(set)
+        self.socialclub_map = defaultdict(list)
+        self.socialclub_to_account_ids = defaultdict(set)
+        # Einfügereihenfolge merken, damit inkrementelle Ergebnisse wie ein Komplettlauf sortiert sind
+        self.account_rank = {}
+        self.socialclub_rank = {}
+        self.set_rules(rule_set or active_rules())
+        # Zusammenhangskomponenten des Graphen Account <-> Socialclub (Ringe über mehrere Ecken).
+        # Die Cluster-ID ist der zuerst eingelesene Account der Komponente.
+        self.clusters = DisjointSet()
+        self.cluster_anchor = {}
+        # Alle Einträge in Einlesereihenfolge mit einmal geparster Login-Zeit (-1 = nicht lesbar).
+        # Geparst wird erst bei der ersten Zeitraum-Abfrage; time_order/sorted_times (nach Login-Zeit
+        # sortiert) werden nach neuen Einträgen neu aufgebaut.
+        self.entries = []
+        self.entry_times = array('q')
+        self.time_order = None
+        self.sorted_times = None
+
+    def set_rules(self, rule_set):
+        self.rules = rule_set
+        self.rules_digest = rule_set.digest
+        # Regelname -> {account_id: Sanktion} bzw. {Socialclub: [Sanktionen]}
+        self.account_hits = {rule.name: {} for rule in rule_set.account_rules}
+        self.socialclub_hits = {rule.name: {} for rule in rule_set.socialclub_rules}
+        # Prioritätentabelle pro Account: account_id -> {(Regelname, Socialclub): erste Sanktion}
+        self.hits_by_account = defaultdict(dict)
+        self.combined_sanctions = {}
+
+    def apply_rules(self, rule_set):
+        # Geänderte Regeln: nur neu auswerten, die Gruppierungs-Maps bleiben
+        self.set_rules(rule_set)
+        self.evaluate_all()
+
+    def __getstate__(self):
+        # Die Regeln selbst kommen beim Laden aus der Regeldatei; gespeichert wird nur ihr Digest
+        state = self.__dict__.copy()
+        del state['rules']
+        # Der Zeit-Index lässt sich aus entry_times jederzeit neu sortieren
+        state['time_order'] = state['sorted_times'] = None
+        state['entry_times'] = self.entry_times.tobytes()
+        return state
+
+    def __setstate__(self, state):
+        entry_times = array('q')
+        entry_times.frombytes(state.pop('entry_times'))
+        self.__dict__.update(state)
+        self.entry_times = entry_times
+        self.rules = None
+
+    def add_account(self, account, login_time=None):
+        account_id = account.account_id
+        socialclub = account.socialclub
+        self.entries.append(account)
+        if login_time is not None:
+            self.entry_times.append(login_time)
+        self.time_order = None
+        info = self.account_info.get(account_id)
+        if info is None:
+            self.account_info[account_id] = [account.username, account.total_logins]
+            self.account_rank[account_id] = len(self.account_rank)
+            self.clusters.add(account_id)
+            self.cluster_anchor[account_id] = account_id
         else:
-            seen_entries[key] = {
-                'username': parts[0],
-                'account_id': parts[1],
-                'socialclub': parts[3],
-                'login_date': parts[4] + ' ' + parts[5],
-                'first_login_page': parts[7].strip('Page:').strip('()'),
-                'total_logins': total_logins
-            }
-
-    accounts = list(seen_entries.values())
-    return accounts
+            info[1] += account.total_logins
+        if socialclub not in self.socialclub_rank:
+            self.socialclub_rank[socialclub] = len(self.socialclub_rank)
+        self.account_map[account_id].add(socialclub)
+        self.socialclub_map[socialclub].append(account)
+        sc_account_ids = self.socialclub_to_account_ids[socialclub]
+        if account_id not in sc_account_ids:
+            if sc_account_ids:
+                self.link_accounts(account_id, next(iter(sc_account_ids)))
+            sc_account_ids.add(account_id)
+
+    def link_accounts(self, account_id, other_id):
+        root, absorbed = self.clusters.union(account_id, other_id)
+        if absorbed is not None:
+            anchor = self.cluster_anchor[root]
+            other_anchor = self.cluster_anchor.pop(absorbed)
+            if self.account_rank[other_anchor] < self.account_rank[anchor]:
+                self.cluster_anchor[root] = other_anchor
+
+    def cluster_of(self, account_id):
+        return self.cluster_anchor[self.clusters.find(account_id)]
+
+    def clusters_summary(self, min_accounts=2):
+        # Alle Komponenten mit mindestens min_accounts Accounts, größte zuerst
+        members = defaultdict(list)
+        for account_id in self.account_map:
+            members[self.cluster_of(account_id)].append(account_id)
+        sanctioned_ids = self.hits_by_account.keys() | set().union(*self.account_hits.values())
+        clusters = []
+        for cluster_id, account_ids in members.items():
+            if len(account_ids) < min_accounts:
+                continue
+            socialclubs = {}
+            for account_id in account_ids:
+                socialclubs.update(dict.fromkeys(self.account_map[account_id]))
+            clusters.append({
+                'Cluster': cluster_id,
+                'Accounts': account_ids,
+                'Socialclubs': list(socialclubs),
+                'Sanktioniert': [account_id for account_id in account_ids if account_id in sanctioned_ids]
+            })
+        clusters.sort(key=lambda c: len(c['Accounts']), reverse=True)
+        return clusters
+
+    def recount_logins(self, account_id):
+        total = 0
+        for socialclub in self.account_map[account_id]:
+            for acc in self.socialclub_map[socialclub]:
+                if acc.account_id == account_id:
+                    total += acc.total_logins
+        self.account_info[account_id][1] = total
+
+    def make_sanction(self, rule, account_id, username, socialclubs, label, total_logins):
+        return {
+            'Regelverstoß': rule.violation,
+            'Account ID': account_id,
+            'Benutzername': username,
+            'Socialclubs': socialclubs,
+            'Sanktion': rule.sanction_text(label, total_logins),
+            'total_logins': total_logins,  # Logins hinzufügen
+            'label': label,
+            'priority': self.rules.priority(label)
+        }
+
+    def evaluate_account(self, account_id):
+        # Alle Regeln mit Group = account (standardmäßig §1.1)
+        socialclubs = self.account_map[account_id]
+        for rule in self.rules.account_rules:
+            hits = self.account_hits[rule.name]
+            hits.pop(account_id, None)
+            if len(socialclubs) < rule.min_count:
+                continue
+            if rule.require_shared and not any(len(self.socialclub_to_account_ids[sc]) > 1 for sc in socialclubs):
+                continue
+            username, total_logins = self.account_info[account_id]
+            hits[account_id] = self.make_sanction(rule, account_id, username, ', '.join(socialclubs), rule.sanction, total_logins)
+
+    def evaluate_socialclub(self, socialclub, main_account_id=None):
+        # Alle Regeln mit Group = socialclub (standardmäßig §1.4)
+        sc_accounts = self.socialclub_map[socialclub]
+        for rule in self.rules.socialclub_rules:
+            hits = self.socialclub_hits[rule.name]
+            for sanction in hits.pop(socialclub, ()):
+                by_account = self.hits_by_account[sanction['Account ID']]
+                by_account.pop((rule.name, socialclub), None)
+                if not by_account:
+                    del self.hits_by_account[sanction['Account ID']]
+            count = len(sc_accounts) if rule.count == 'entries' else len(self.socialclub_to_account_ids[socialclub])
+            if count < rule.min_count:
+                continue
+            # Nur Regeln mit MainSanction unterscheiden den Hauptaccount; er ist für alle Regeln derselbe
+            rule_main_id = None
+            if rule.main_sanction is not None:
+                if main_account_id is None:
+                    # max() statt sorted(): gleiche Auswahl bei Gleichstand, aber ohne Kopie der Liste
+                    main_account_id = max(sc_accounts, key=lambda x: x.total_logins).account_id
+                rule_main_id = main_account_id
+            sanctions = []
+            for acc in sc_accounts:
+                label = rule.main_sanction if acc.account_id == rule_main_id else rule.sanction
+                sanction = self.make_sanction(rule, acc.account_id, acc.username, acc.socialclub, label, acc.total_logins)
+                sanctions.append(sanction)
+                self.hits_by_account[acc.account_id].setdefault((rule.name, socialclub), sanction)
+            hits[socialclub] = sanctions
+
+    def evaluate_combined(self, account_id):
+        self.combined_sanctions.pop(account_id, None)
+        by_account = self.hits_by_account.get(account_id, {})
+        hits = []
+        for rule in self.rules.rules:
+            if rule.group == 'account':
+                sanction = self.account_hits[rule.name].get(account_id)
+            else:
+                # Wie bisher gewinnt die Sanktion aus dem zuerst eingelesenen Socialclub
+                candidates = [socialclub for name, socialclub in by_account if name == rule.name]
+                sanction = by_account[(rule.name, min(candidates, key=self.socialclub_rank.__getitem__))] if candidates else None
+            if sanction is not None:
+                hits.append((rule, sanction))
+        if len(hits) < 2:
+            return
+        text, label, priority, total_logins = self.rules.combine(hits)
+        first = hits[0][1]
+        self.combined_sanctions[account_id] = {
+            'Regelverstoß': ' + '.join(sanction['Regelverstoß'] for _, sanction in hits),
+            'Account ID': account_id,
+            'Benutzername': first['Benutzername'],
+            'Socialclubs': first['Socialclubs'],
+            'Sanktion': text,
+            'total_logins': total_logins,  # Logins hinzufügen
+            'label': label,
+            'priority': priority
+        }
+
+    def evaluate_all(self, progress=None, cancel_event=None):
+        total = len(self.account_map) + len(self.socialclub_map)
+        # Erzeugt viele Sanktions-Dicts; die zyklische GC fände darunter nichts zum Aufräumen
+        with metrics.stage('check_sanctions'), gc_paused():
+            if numpy_backend() and self.account_rank:
+                self.evaluate_all_vectorized(progress, cancel_event)
+            else:
+                steps = [(self.evaluate_account, self.account_map), (self.evaluate_socialclub, self.socialclub_map)]
+                done = 0
+                for evaluate, keys in steps:
+                    for key in keys:
+                        evaluate(key)
+                        done += 1
+                        if done % EVALUATE_REPORT_EVERY == 0:
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise ReloadCancelled()
+                            if progress is not None:
+                                progress(f"Regeln geprüft: {done} von {total}", done / total)
+        with metrics.stage('combined'), gc_paused():
+            for account_id in self.hits_by_account.keys() | set().union(*self.account_hits.values()):
+                self.evaluate_combined(account_id)
+        if progress is not None:
+            progress(f"Regeln geprüft: {total} von {total}", 1.0)
+
+    def evaluate_all_vectorized(self, progress=None, cancel_event=None):
+        """
+        Komplettauswertung mit NumPy: Schwellen und Hauptaccount-Suche laufen als Array-Operationen
+        über ganzzahlige Codes (Position in den Gruppierungs-Maps). Nur die so gefundenen Kandidaten
+        werden danach in Python exakt geprüft; Ergebnis und Reihenfolge sind dieselben wie im Python-Pfad.
+        Das Gruppieren selbst (add_account) bleibt reines Python: die Maps und Cluster werden für das
+        inkrementelle Nachladen, die GUI und die Datenbank als Python-Objekte gebraucht.
+        """
+        account_ids = list(self.account_map)
+        socialclubs = list(self.socialclub_map)
+        # map(len, ...) läuft ohne Python-Schleife; die Maps enthalten bereits die verschiedenen Socialclubs/Accounts
+        account_sc_counts = np.fromiter(map(len, self.account_map.values()), dtype=np.int64, count=len(account_ids))
+        sc_entries = np.fromiter(map(len, self.socialclub_map.values()), dtype=np.int64, count=len(socialclubs))
+        sc_account_counts = np.fromiter(map(len, map(self.socialclub_to_account_ids.__getitem__, socialclubs)),
+                                        dtype=np.int64, count=len(socialclubs))
+
+        # RequireShared prüft evaluate_account für die wenigen Kandidaten selbst
+        account_mask = np.zeros(len(account_ids), dtype=bool)
+        for rule in self.rules.account_rules:
+            account_mask |= account_sc_counts >= rule.min_count
+        socialclub_mask = np.zeros(len(socialclubs), dtype=bool)
+        # Hauptaccount nur dort suchen, wo eine Regel mit MainSanction greift
+        main_mask = np.zeros(len(socialclubs), dtype=bool)
+        for rule in self.rules.socialclub_rules:
+            matches = (sc_entries if rule.count == 'entries' else sc_account_counts) >= rule.min_count
+            socialclub_mask |= matches
+            if rule.main_sanction is not None:
+                main_mask |= matches
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReloadCancelled()
+
+        # Hauptaccount pro Socialclub: meiste Logins, bei Gleichstand der erste Eintrag (wie max())
+        main_codes = np.flatnonzero(main_mask)
+        main_socialclubs = [socialclubs[code] for code in main_codes.tolist()]
+        entries = list(chain.from_iterable(map(self.socialclub_map.__getitem__, main_socialclubs)))
+        logins = np.fromiter(map(attrgetter('total_logins'), entries), dtype=np.int64, count=len(entries))
+        sizes = sc_entries[main_codes]
+        groups = np.repeat(np.arange(len(main_codes)), sizes)
+        order = np.lexsort((np.arange(len(entries)), -logins, groups))
+        main_accounts = dict(zip(main_socialclubs, (entries[i].account_id for i in order[np.cumsum(sizes) - sizes].tolist())))
+        candidates = np.flatnonzero(socialclub_mask)
+        if progress is not None:
+            progress(f"Regeln geprüft: {len(candidates)} Socialclubs mit Verstößen", 0.5)
+
+        for code in np.flatnonzero(account_mask).tolist():
+            self.evaluate_account(account_ids[code])
+        for code in candidates.tolist():
+            socialclub = socialclubs[code]
+            self.evaluate_socialclub(socialclub, main_accounts.get(socialclub))
+
+    def login_times(self):
+        # Nur die noch nicht geparsten Einträge am Ende umrechnen, jedes Datum also genau einmal
+        if len(self.entry_times) < len(self.entries):
+            self.entry_times.extend(map(login_timestamp, map(attrgetter('login_date'), self.entries[len(self.entry_times):])))
+        return self.entry_times
+
+    def window(self, days, progress=None, cancel_event=None):
+        """
+        Neuer SanctionIndex nur mit den Einträgen der letzten days Tage, gemessen am neuesten Login im Dump.
+        Die Login-Zeiten werden dafür nicht neu geparst: der nach Zeit sortierte Index liefert den Bereich
+        per bisect, danach werden nur diese Einträge in Einlesereihenfolge gruppiert und mit denselben Regeln geprüft.
+        """
+        if self.time_order is None:
+            entry_times = self.login_times()
+            self.time_order = sorted(range(len(self.entries)), key=entry_times.__getitem__)
+            self.sorted_times = array('q', map(entry_times.__getitem__, self.time_order))
+        view = SanctionIndex(self.rules)
+        if self.sorted_times:
+            # Nicht lesbare Login-Zeiten (-1) liegen vorne und fallen aus jedem Zeitraum heraus
+            start = bisect_left(self.sorted_times, max(self.sorted_times[-1] - days * 86400, 0))
+            with metrics.stage('group'), gc_paused():
+                for position in sorted(self.time_order[start:]):
+                    view.add_account(self.entries[position], self.entry_times[position])
+        view.evaluate_all(progress, cancel_event)
+        return view
+
+    def evaluate_affected(self, account_ids, socialclubs):
+        # Eine Änderung in einem Socialclub kann Account-Regeln (§1.1) für alle seine Accounts kippen
+        affected_ids = set(account_ids)
+        with metrics.stage('check_sanctions'):
+            for socialclub in socialclubs:
+                affected_ids |= self.socialclub_to_account_ids[socialclub]
+                self.evaluate_socialclub(socialclub)
+            for account_id in affected_ids:
+                self.recount_logins(account_id)
+                self.evaluate_account(account_id)
+        with metrics.stage('combined'):
+            for account_id in affected_ids:
+                self.evaluate_combined(account_id)
+
+    def results(self):
+        # Account-Regeln landen im ersten Abschnitt (bisher §1.1), Socialclub-Regeln im zweiten (bisher §1.4)
+        account_ids = set().union(*self.account_hits.values()) - self.combined_sanctions.keys()
+        sanctions_1_1 = [
+            self.account_hits[rule.name][account_id]
+            for account_id in sorted(account_ids, key=self.account_rank.__getitem__)
+            for rule in self.rules.account_rules
+            if account_id in self.account_hits[rule.name]
+        ]
+        sanctions_1_4 = defaultdict(list)
+        for socialclub in sorted(set().union(*self.socialclub_hits.values()), key=self.socialclub_rank.__getitem__):
+            for rule in self.rules.socialclub_rules:
+                sanctions_1_4[socialclub].extend(self.socialclub_hits[rule.name].get(socialclub, ()))
+        combined_sanctions = [
+            self.combined_sanctions[account_id]
+            for account_id in sorted(self.combined_sanctions, key=self.account_rank.__getitem__)
+        ]
+        # Cluster-IDs erst hier setzen, da spätere Zeilen Komponenten noch zusammenlegen können
+        for sanctions in (sanctions_1_1, *sanctions_1_4.values(), combined_sanctions):
+            for sanction in sanctions:
+                sanction['Cluster'] = self.cluster_of(sanction['Account ID'])
+        return sanctions_1_1, sanctions_1_4, combined_sanctions
 
 def check_sanctions(accounts):
-    account_map = defaultdict(set)
-    socialclub_map = defaultdict(list)
-    socialclub_to_account_ids = defaultdict(set)
-    sanctions_1_1 = {}
-    sanctions_1_4 = defaultdict(list)
-    combined_sanctions = []
-
-    # Accounts und Social Clubs zuordnen
-    for account in accounts:
-        account_map[account['account_id']].add(account['socialclub'])
-        socialclub_map[account['socialclub']].append(account)
-        socialclub_to_account_ids[account['socialclub']].add(account['account_id'])
-
-    # Logik für §1.1-Prüfung 
-    for account_id, socialclubs in account_map.items():
-        if len(socialclubs) > 1:
-            for socialclub in socialclubs:
-                other_accounts = socialclub_to_account_ids[socialclub] - {account_id}
-                if other_accounts:
-                    sanctions_1_1[account_id] = {
-                        'Regelverstoß': '§1.1 - Mehrere Social Clubs für einen Account',
-                        'Account ID': account_id,
-                        'Benutzername': accounts[0]['username'],
-                        'Socialclubs': ', '.join(socialclubs),
-                        'Sanktion': 'Permanenter Bann',
-                        'total_logins': account['total_logins']  # Logins hinzufügen
-                    }
+    # accounts darf auch ein Generator sein
+    index = SanctionIndex()
+    with gc_paused():
+        for account in accounts:
+            index.add_account(account)
+    index.evaluate_all()
+    return index.results()
+
+def is_compressed(file_path):
+    return file_path.lower().endswith(('.gz', '.xz'))
+
+def resolve_input_paths(patterns):
+    """
+    Löst Dateinamen und Globs (z.B. acp_2024-05-*.txt.gz) in die Liste der Eingabedateien auf.
+    Globs werden selbst aufgelöst, da die Windows-Konsole das nicht tut; Treffer eines Globs
+    werden nach Namen sortiert, damit Tagesarchive in zeitlicher Reihenfolge eingelesen werden.
+    """
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+class HashingReader:
+    # Reicht die Rohbytes an den Dekompressor durch und hasht sie dabei, damit die Datei nur einmal gelesen wird
+    def __init__(self, file, hasher):
+        self.file = file
+        self.hasher = hasher
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hasher.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def seekable(self):
+        return False
+
+class AcpSource:
+    """Lesestand einer einzelnen ACP-Datei: Byte-Offset, Dateiidentität und Hash über die gelesenen Bytes."""
+
+    HEAD_SIZE = 4096
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.compressed = is_compressed(file_path)
+        self.offset = 0
+        self.file_id = None
+        self.head = b''
+        # Letzte Zeile ohne Zeilenende: schon ausgewertet, liegt aber noch hinter dem Offset
+        self.pending_tail = b''
+        # Hash über die bereits verarbeiteten Bytes, für die Gültigkeitsprüfung des Snapshots
+        self.hasher = hashlib.blake2b()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['hasher']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.hasher = None
+
+    def prefix_digest(self):
+        if self.hasher is None:
+            self.hasher = hash_file_prefix(self.file_path, self.offset)
+        return self.hasher.hexdigest()
+
+    def signature(self):
+        return f"{os.path.abspath(self.file_path)}:{self.offset}+{len(self.pending_tail)}:{self.prefix_digest()}"
+
+    def is_unchanged(self, file, stat, may_grow):
+        # Komprimierte Dateien und Dateien mit Nachfolgern müssen exakt so groß sein wie beim letzten Lesen
+        known_size = self.offset + len(self.pending_tail)
+        if self.file_id != (stat.st_dev, stat.st_ino) or stat.st_size < known_size:
+            return False
+        if stat.st_size != known_size and (self.compressed or not may_grow):
+            return False
+        # Die ersten Bytes vergleichen, falls die Datei ersetzt wurde und wieder gewachsen ist
+        file.seek(0)
+        if file.read(len(self.head)) != self.head:
+            return False
+        if self.pending_tail:
+            # Die vorläufig ausgewertete letzte Zeile darf nur ihr Zeilenende bekommen haben;
+            # wurde sie weitergeschrieben, stimmt ihr Eintrag nicht mehr und es wird komplett neu eingelesen
+            file.seek(self.offset)
+            data = file.read(len(self.pending_tail) + 2)
+            rest = data[len(self.pending_tail):]
+            return data.startswith(self.pending_tail) and (rest in (b'', b'\r') or rest.startswith((b'\n', b'\r\n')))
+        return True
+
+    def consume(self, data):
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.offset += len(data)
+
+    def read_lines(self, file, size, more_files_follow, progress=None, cancel_event=None):
+        """
+        Liefert die noch nicht verarbeiteten Zeilen ab self.offset.
+        more_files_follow: es folgen weitere Dateien, eine letzte Zeile ohne Zeilenende gehört also trotzdem dazu.
+        """
+        if len(self.head) < self.HEAD_SIZE:
+            file.seek(0)
+            self.head = file.read(self.HEAD_SIZE)
+        if self.compressed:
+            # Komprimierte Dateien werden nur komplett gelesen; ist der Offset gesetzt, ist nichts mehr zu tun
+            return iter(()) if self.offset else self._read_compressed_lines(file, size, progress, cancel_event)
+        if self.pending_tail:
+            # Die offene letzte Zeile ist schon ausgewertet; sie wird übersprungen, sobald ihr Zeilenende
+            # da ist oder weitere Dateien folgen (is_unchanged hat geprüft, dass sie unverändert ist)
+            file.seek(self.offset + len(self.pending_tail))
+            rest = file.read(2)
+            terminator = 1 if rest.startswith(b'\n') else 2 if rest.startswith(b'\r\n') else 0
+            if not terminator and not more_files_follow:
+                return iter(())
+            self.consume(self.pending_tail + rest[:terminator])
+            self.pending_tail = b''
+        file.seek(self.offset)
+        return self._read_complete_lines(file, size, more_files_follow, progress, cancel_event)
+
+    def _read_compressed_lines(self, file, size, progress, cancel_event):
+        # Gestreamt dekomprimieren; es liegt nie mehr als ein Block entpackt im Speicher
+        file.seek(0)
+        reader = HashingReader(file, self.hasher)
+        stream = gzip.GzipFile(fileobj=reader) if self.file_path.lower().endswith('.gz') else lzma.LZMAFile(reader)
+        line_count = 0
+        with io.TextIOWrapper(stream, encoding=ACP_ENCODING, errors='replace') as text:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                read_start = time.perf_counter()
+                lines = text.readlines(self.CHUNK_SIZE)
+                metrics.add_time('read', time.perf_counter() - read_start)
+                if not lines:
                     break
+                line_count += len(lines)
+                yield from lines
+                if progress is not None:
+                    progress(f"{line_count} Zeilen eingelesen", reader.bytes_read / size if size else 1.0)
+        self.offset = reader.bytes_read
+
+    def _read_complete_lines(self, file, size, more_files_follow, progress, cancel_event):
+        # Der Offset bleibt immer hinter einem Zeilenende; eine letzte Zeile ohne Zeilenende zählt wie bei
+        # einem kompletten Einlesen mit, bleibt aber als pending_tail vor dem Offset, bis sie abgeschlossen ist
+        line_count = 0
+        while True:
+            # Abbruch nur an Blockgrenzen, damit der Offset immer auf einem Zeilenanfang steht
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            read_start = time.perf_counter()
+            chunk = file.read(self.CHUNK_SIZE)
+            if not chunk:
+                return
+            end = chunk.rfind(b'\n') + 1
+            if end == 0 and len(chunk) == self.CHUNK_SIZE:
+                # Überlange Zeile: weiterlesen, bis ein Zeilenende gefunden wird
+                chunk += file.readline()
+                end = len(chunk) if chunk.endswith(b'\n') else 0
+            if end == 0:
+                if not more_files_follow:
+                    # Unvollständige Zeilen (halb geschrieben) bleiben ganz für den nächsten Lauf liegen
+                    line = chunk.decode(ACP_ENCODING, errors='replace')
+                    metrics.add_time('read', time.perf_counter() - read_start)
+                    if split_acp_line(line) is not None:
+                        self.pending_tail = chunk
+                        yield line
+                    return
+                end = len(chunk)
+            elif end < len(chunk):
+                file.seek(end - len(chunk), os.SEEK_CUR)
+            self.consume(chunk[:end])
+            lines = chunk[:end].decode(ACP_ENCODING, errors='replace').splitlines()
+            metrics.add_time('read', time.perf_counter() - read_start)
+            line_count += len(lines)
+            yield from lines
+            if progress is not None:
+                progress(f"{line_count} Zeilen eingelesen", self.offset / size if size else 1.0)
+
+def file_progress(progress, position, count):
+    # Fortschritt einer Datei auf den Gesamtfortschritt über alle Eingabedateien umrechnen
+    if progress is None or count == 1:
+        return progress
+    return lambda text, fraction: progress(f"Datei {position + 1} von {count}: {text}", (position + fraction) / count)
+
+class AcpIngestState:
+    """
+    Merkt sich Lesestand und Gruppierungszustand für eine oder mehrere ACP-Dateien (auch .gz/.xz).
+    Alle Dateien teilen sich seen_entries, Dubletten werden also dateiübergreifend zusammengeführt.
+    refresh() verarbeitet nur angehängte Zeilen der letzten Datei und neu hinzugekommene Dateien;
+    ist eine bereits gelesene Datei verändert, gekürzt oder rotiert, wird komplett neu eingelesen.
+    """
 
-    for socialclub, accounts in socialclub_map.items():
-        if len(accounts) > 2:
-            accounts_sorted_by_logins = sorted(accounts, key=lambda x: x['total_logins'], reverse=True)
-            main_account_id = accounts_sorted_by_logins[0]['account_id']
-            for acc in accounts:
-                if acc['account_id'] == main_account_id:
-                    sanction_text = f'Hauptaccount Bann 60 Tage (Logins: {acc["total_logins"]})'
-                else:
-                    sanction_text = f'Permanenter Bann (Logins: {acc["total_logins"]})'
-                sanctions_1_4[socialclub].append({
-                    'Regelverstoß': '§1.4 - Mehrere Accounts mit einem Social Club',
-                    'Account ID': acc['account_id'],
-                    'Benutzername': acc['username'],
-                    'Socialclubs': acc['socialclub'],
-                    'Sanktion': sanction_text,
-                    'total_logins': acc['total_logins']  # Logins hinzufügen
-                })
-
-    already_combined_ids = set()
-    combined_sanctions_map = {}
-
-    for account_id, sanction_1_1 in list(sanctions_1_1.items()):
-        for socialclub, sanctions in list(sanctions_1_4.items()):
-            for sanction_1_4 in sanctions:
-                if sanction_1_4['Account ID'] == account_id:
-                    combined_key = (account_id, sanction_1_1['Socialclubs'])
-                    if combined_key not in combined_sanctions_map:
-                        combined_sanctions_map[combined_key] = {
-                            'Regelverstoß': sanction_1_1['Regelverstoß'] + ' + ' + sanction_1_4['Regelverstoß'],
-                            'Account ID': account_id,
-                            'Benutzername': sanction_1_1['Benutzername'],
-                            'Socialclubs': sanction_1_1['Socialclubs'],
-                            'Sanktion': combine_sanctions(sanction_1_1['Sanktion'], sanction_1_4['Sanktion']),
-                            'total_logins': sanction_1_4['total_logins']  # Logins hinzufügen
-                        }
-                    already_combined_ids.add(account_id)
-                    break
+    def __init__(self, input_paths, workers=1):
+        self.input_paths = [input_paths] if isinstance(input_paths, str) else list(input_paths)
+        self.workers = workers
+        # Zeitraum in Tagen (0 = alle Daten); die Auswertung dafür liegt in window_index
+        self.window_days = 0
+        self.reset()
+
+    def reset(self):
+        self.sources = []
+        self.seen_entries = {}
+        self.index = SanctionIndex()
+        self.window_index = None
+        self.changed = True
+        # Datenbankabgleich: seit dem Stand db_signature neue (ab db_start) und zusammengeführte Einträge
+        self.db_signature = None
+        self.db_start = 0
+        self.db_updated = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['window_index'] = None
+        return state
+
+    def active_index(self):
+        # Index, dessen Ergebnisse gerade angezeigt werden: mit Zeitraum die Teilauswertung, sonst alles
+        return self.window_index if self.window_days and self.window_index is not None else self.index
+
+    def set_window(self, days):
+        # Beim nächsten refresh() wird nur der Zeitraum neu ausgewertet, die Dateien werden nicht neu geparst
+        if days != self.window_days:
+            self.window_days = days
+            self.window_index = None
+
+    @property
+    def file_path(self):
+        return ', '.join(self.input_paths)
+
+    def source_signature(self):
+        return '|'.join(source.signature() for source in self.sources)
+
+    def entries_since(self, signature):
+        # Seit dem Datenbankstand signature neue oder geänderte Einträge; None, wenn nur komplettes Neuladen hilft
+        if signature is None or signature != self.db_signature:
+            return None
+        return chain(self.index.entries[self.db_start:], self.db_updated)
+
+    def mark_synced(self):
+        self.db_signature = self.source_signature()
+        self.db_start = len(self.index.entries)
+        self.db_updated = []
+        self.changed = True
+
+    def _sources_unchanged(self, paths):
+        known = len(self.sources)
+        if known == 0 or [source.file_path for source in self.sources] != paths[:known]:
+            return False
+        for position, source in enumerate(self.sources):
+            try:
+                with open(source.file_path, 'rb') as file:
+                    # Nur die zuletzt gelesene Datei darf weiterwachsen, sonst stimmt die Einlesereihenfolge nicht mehr
+                    if not source.is_unchanged(file, os.fstat(file.fileno()), may_grow=position == known - 1):
+                        return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def refresh(self, progress=None, cancel_event=None):
+        """
+        progress(text, fraction) wird regelmäßig mit dem Fortschritt aufgerufen.
+        Ist cancel_event gesetzt, bricht refresh() mit ReloadCancelled ab. Komplettes Einlesen läuft in
+        einen frischen Zustand, der erst bei Erfolg übernommen wird; bei Abbruch oder Fehler bleibt der
+        bisherige Stand samt angezeigten Ergebnissen gültig. Ein abgebrochenes Nachladen bleibt konsistent.
+        """
+        paths = resolve_input_paths(self.input_paths)
+        if not paths:
+            raise FileNotFoundError(f"Keine ACP-Datei gefunden: {self.file_path}")
+        if not self._sources_unchanged(paths):
+            fresh = AcpIngestState(self.input_paths, self.workers)
+            fresh.window_days = self.window_days
+            results = fresh._refresh(paths, True, progress, cancel_event)
+            self.__dict__.update(fresh.__dict__)
+            return results
+        return self._refresh(paths, False, progress, cancel_event)
+
+    def _refresh(self, paths, full_rebuild, progress, cancel_event):
+        if not full_rebuild:
+            rule_set = active_rules()
+            if self.index.rules_digest != rule_set.digest:
+                # Regeldatei geändert: Gruppierungs-Maps weiterverwenden, nur die Auswertung wiederholen
+                self.index.apply_rules(rule_set)
+                self.window_index = None
+                self.changed = True
+            else:
+                self.index.rules = rule_set
+        touched_ids = set()
+        touched_socialclubs = set()
+
+        for position in range(max(len(self.sources) - 1, 0), len(paths)):
+            if position == len(self.sources):
+                self.sources.append(AcpSource(paths[position]))
+                self.changed = True
+            self._read_source(self.sources[position], more_files_follow=position < len(paths) - 1,
+                              full_rebuild=full_rebuild, touched_ids=touched_ids, touched_socialclubs=touched_socialclubs,
+                              progress=file_progress(progress, position, len(paths)), cancel_event=cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+        if full_rebuild:
+            # Ein halb aufgebauter frischer Zustand wird von refresh() gar nicht erst übernommen
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReloadCancelled()
+            # Erst nach dem Deduplizieren einordnen, damit die Login-Summen stimmen
+            with metrics.stage('group'), gc_paused():
+                for account in self.seen_entries.values():
+                    self.index.add_account(account)
+            self.index.evaluate_all(progress, cancel_event)
+
+        if touched_ids:
+            # Beim Nachladen bis zum Abbruch gelesene Zeilen trotzdem auswerten, damit Offset und Index zusammenpassen
+            self.index.evaluate_affected(touched_ids, touched_socialclubs)
+        if full_rebuild or touched_ids:
+            self.window_index = None
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReloadCancelled()
+        if self.window_days and self.window_index is None:
+            with metrics.stage('window'):
+                self.window_index = self.index.window(self.window_days, progress, cancel_event)
+        with metrics.stage('results'):
+            results = self.active_index().results()
+        metrics.count_results(*results)
+        return results
+
+    def _read_source(self, source, more_files_follow, full_rebuild, touched_ids, touched_socialclubs, progress, cancel_event):
+        with open(source.file_path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            source.file_id = (stat.st_dev, stat.st_ino)
+            offset = source.offset
+
+            if full_rebuild and not source.compressed and self.workers > 1 and stat.st_size >= PARALLEL_MIN_BYTES:
+                if progress is not None:
+                    progress(f"Lese {stat.st_size / (1 << 20):.0f} MB mit {self.workers} Prozessen ...", 0.0)
+                source.head = file.read(source.HEAD_SIZE)
+                end = find_last_line_end(file, stat.st_size)
+                with metrics.stage('read_parse'):
+                    parse_acp_file_parallel(source.file_path, 0, end, self.workers, self.seen_entries)
+                source.offset = end
+                source.hasher = None
+
+            lines = source.read_lines(file, stat.st_size, more_files_follow, progress, cancel_event)
+            if full_rebuild:
+                with metrics.stage('read_parse'), gc_paused():
+                    parse_acp_lines(lines, self.seen_entries)
+            else:
+                start_count = len(self.seen_entries)
+                lines_read = lines_skipped = 0
+                with metrics.stage('read_parse'):
+                    for line in lines:
+                        lines_read += 1
+                        entry_count = len(self.seen_entries)
+                        account = parse_acp_line(line, self.seen_entries)
+                        if account is None:
+                            lines_skipped += 1
+                            continue
+                        if len(self.seen_entries) > entry_count:
+                            self.index.add_account(account)
+                        elif self.db_signature is not None:
+                            # Bestehender Eintrag mit neuer Login-Summe, muss in der Datenbank überschrieben werden
+                            self.db_updated.append(account)
+                        touched_ids.add(account.account_id)
+                        touched_socialclubs.add(account.socialclub)
+                metrics.count_parsed(lines_read, lines_skipped, len(self.seen_entries) - start_count)
+
+        if source.offset != offset:
+            self.changed = True
+        if source.compressed and source.offset == 0 and cancel_event is not None and cancel_event.is_set():
+            # Eine komprimierte Datei lässt sich nicht ab der Mitte fortsetzen: mit Offset 0 gilt sie beim
+            # nächsten refresh() als verändert und alles wird komplett neu eingelesen
+            source.hasher = hashlib.blake2b()
+
+def hash_file_prefix(file_path, length):
+    hasher = hashlib.blake2b()
+    with open(file_path, 'rb') as file:
+        while length > 0:
+            block = file.read(min(length, 1 << 20))
+            if not block:
+                break
+            hasher.update(block)
+            length -= len(block)
+    return hasher
+
+class SnapshotUnpickler(pickle.Unpickler):
+    # Nur die eigenen Klassen zulassen, egal ob LogTool als Skript (__main__) oder als Modul lief
+    ALLOWED = {
+        ('collections', 'defaultdict'), ('builtins', 'set'), ('builtins', 'list'), ('builtins', 'dict')
+    }
+    OWN_CLASSES = {'Account', 'DisjointSet', 'SanctionIndex', 'AcpIngestState', 'AcpSource'}
 
-    combined_sanctions = list(combined_sanctions_map.values())
+    def find_class(self, module, name):
+        if module in ('__main__', __name__) and name in self.OWN_CLASSES:
+            return globals()[name]
+        if (module, name) in self.ALLOWED:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"{module}.{name} ist im Snapshot nicht erlaubt")
 
-    sanctions_1_1 = [s for s in sanctions_1_1.values() if s['Account ID'] not in already_combined_ids]
+class SnapshotCache:
+    """
+    Binäre Snapshots des Einlesezustands (Accounts, Gruppierungs-Maps, Sanktionen) pro Satz von Eingabedateien.
+    Ein Snapshot gilt, solange bei jeder gelesenen Datei Größe und Änderungszeit gleich sind oder der Hash über
+    den verarbeiteten Dateianfang übereinstimmt; angehängte Zeilen und neue Dateien werden danach nachgelesen.
+    """
 
-    return sanctions_1_1, sanctions_1_4, combined_sanctions
+    VERSION = 7
+    PREFIX = 'logtool_'
+    SUFFIX = '.snapshot'
 
-def combine_sanctions(sanction_1_1, sanction_1_4):
-    if sanction_1_1 == sanction_1_4:
-        return sanction_1_1
-    
-    if "Permanenter Bann" in sanction_1_1 and "Permanenter Bann" in sanction_1_4:
-        logins_1_1 = int(sanction_1_1.split("Logins:")[1].strip(')').strip()) if "Logins:" in sanction_1_1 else 0
-        logins_1_4 = int(sanction_1_4.split("Logins:")[1].strip(')').strip()) if "Logins:" in sanction_1_4 else 0
-        combined_logins = logins_1_1 + logins_1_4
-        return f'Permanenter Bann (Logins: {combined_logins})'
-    
-    if "Hauptaccount Bann 60 Tage" in sanction_1_1 or "Hauptaccount Bann 60 Tage" in sanction_1_4:
-        return 'Permanenter Bann'
-    
-    return f"Permanenter Bann"
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def input_key(self, input_paths):
+        return '\n'.join(os.path.abspath(path) for path in input_paths)
+
+    def path_for(self, input_paths):
+        name = hashlib.blake2b(self.input_key(input_paths).encode('utf-8'), digest_size=8).hexdigest()
+        return os.path.join(self.directory, self.PREFIX + name + self.SUFFIX)
+
+    def load(self, input_paths):
+        snapshot_path = self.path_for(input_paths)
+        try:
+            with open(snapshot_path, 'rb') as file:
+                header = SnapshotUnpickler(file).load()
+                if header.get('version') != self.VERSION or header.get('input') != self.input_key(input_paths):
+                    raise ValueError("Snapshot passt nicht zu den Eingabedateien")
+                file_ids = []
+                hashers = []
+                for source in header['sources']:
+                    try:
+                        stat = os.stat(source['path'])
+                    except FileNotFoundError:
+                        raise ValueError(f"{source['path']} fehlt") from None
+                    if (stat.st_size, stat.st_mtime_ns) == (source['size'], source['mtime_ns']):
+                        hasher = None
+                    elif stat.st_size >= source['offset'] and not is_compressed(source['path']):
+                        hasher = hash_file_prefix(source['path'], source['offset'])
+                        if hasher.hexdigest() != source['digest']:
+                            raise ValueError(f"{source['path']} wurde verändert")
+                    else:
+                        raise ValueError(f"{source['path']} wurde verändert oder gekürzt")
+                    file_ids.append((stat.st_dev, stat.st_ino))
+                    hashers.append(hasher)
+                with gc_paused():
+                    state = SnapshotUnpickler(file).load()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Ungültige oder veraltete Snapshots sofort entfernen
+            log_action(f"Snapshot {snapshot_path} verworfen: {e}")
+            self.remove(snapshot_path)
+            return None
+
+        state.input_paths = list(input_paths)
+        for source, file_id, hasher in zip(state.sources, file_ids, hashers):
+            source.file_id = file_id
+            source.hasher = hasher
+        state.changed = False
+        os.utime(snapshot_path)  # für die Verdrängung nach letzter Nutzung
+        return state
+
+    def store(self, state):
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_path = self.path_for(state.input_paths)
+        sources = []
+        for source in state.sources:
+            stat = os.stat(source.file_path)
+            sources.append({
+                'path': os.path.abspath(source.file_path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'offset': source.offset,
+                'digest': source.prefix_digest()
+            })
+        header = {
+            'version': self.VERSION,
+            'input': self.input_key(state.input_paths),
+            'sources': sources
+        }
+        temp_path = snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as file, gc_paused():
+            pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, snapshot_path)
+        state.changed = False
+        self.evict(keep=snapshot_path)
+
+    def evict(self, keep=None):
+        # Älteste (zuletzt am längsten ungenutzte) Snapshots löschen, bis die Größengrenze eingehalten ist
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.PREFIX) and name.endswith(self.SUFFIX):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                snapshots.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, path in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                self.remove(path)
+                total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def snapshot_cache():
+    # Snapshots liegen neben der Log-Datei; SnapshotCache = no schaltet sie ab
+    if not config['DEFAULT'].getboolean('SnapshotCache', True):
+        return None
+    directory = os.path.dirname(os.path.abspath(config['DEFAULT'].get('LogFilePath', 'sanktionen_log.txt')))
+    return SnapshotCache(directory, config['DEFAULT'].getint('SnapshotMaxMB', 1024) << 20)
+
+def open_acp_state(input_paths, cache):
+    with metrics.stage('snapshot_load'):
+        state = cache.load(input_paths) if cache is not None else None
+    if state is None:
+        state = AcpIngestState(input_paths)
+    state.workers = parser_workers()
+    state.set_window(config['DEFAULT'].getint('WindowDays', 0))
+    return state
+
+def save_acp_state(state, cache):
+    if cache is not None and state.changed:
+        try:
+            with metrics.stage('snapshot_save'):
+                cache.store(state)
+        except Exception as e:
+            log_action(f"Snapshot konnte nicht gespeichert werden: {e}")
 
-def combine_sanction_sets(existing_sanction, new_sanction):
+class SanctionDatabase:
     """
-    Kombiniere die Sanktionen für eine Account-ID, behalte dabei die Formatierung bei.
-    Priorisiere "Permanenter Bann", wenn es in einer der Sanktionen vorkommt.
+    Optionale SQLite-Ablage für eingelesene Accounts und die Historie abgeschickter Sanktionen.
+    Aktiv, sobald DatabasePath in der Konfiguration gesetzt ist; GUI und Headless-Lauf nutzen dieselbe Datei.
     """
-    if "Permanenter Bann" in existing_sanction or "Permanenter Bann" in new_sanction:
-        return "Permanenter Bann"
-    elif "Hauptaccount Bann 60 Tage" in existing_sanction or "Hauptaccount Bann 60 Tage" in new_sanction:
-        return "Hauptaccount Bann 60 Tage"
-    else:
-        return f"{existing_sanction}, {new_sanction}"
+
+    BATCH_SIZE = 50000
+    # Bei Änderungen an der Tabelle accounts erhöhen; sie wird dann aus dem Einlesezustand neu gefüllt
+    SCHEMA_VERSION = 2
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS accounts (
+            username TEXT NOT NULL,
+            account_id TEXT NOT NULL,
+            socialclub TEXT NOT NULL,
+            login_date TEXT NOT NULL,
+            login_time INTEGER NOT NULL,
+            first_login_page TEXT,
+            total_logins INTEGER NOT NULL,
+            PRIMARY KEY (username, account_id, socialclub, login_date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_accounts_account_id ON accounts (account_id, socialclub);
+        CREATE INDEX IF NOT EXISTS idx_accounts_socialclub ON accounts (socialclub, account_id);
+        CREATE INDEX IF NOT EXISTS idx_accounts_login_time ON accounts (login_time);
+        CREATE TABLE IF NOT EXISTS sanctions (
+            id INTEGER PRIMARY KEY,
+            submitted_at TEXT NOT NULL,
+            account_id TEXT NOT NULL,
+            username TEXT,
+            rule TEXT NOT NULL,
+            socialclubs TEXT,
+            sanction TEXT NOT NULL,
+            ip_check TEXT,
+            level TEXT,
+            cluster TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_sanctions_account_id ON sanctions (account_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if self.get_meta('schema_version') != str(self.SCHEMA_VERSION):
+            # Die Accounts kommen beim nächsten Abgleich komplett neu, die Sanktionshistorie bleibt erhalten
+            with self.connection:
+                self.connection.execute("DROP TABLE IF EXISTS accounts")
+                self.connection.execute("DELETE FROM meta WHERE key = 'accounts_source'")
+                self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                        (str(self.SCHEMA_VERSION),))
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get_meta(self, key):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def sync_accounts(self, state):
+        # Nach angehängten Zeilen nur neue und zusammengeführte Einträge schreiben, sonst komplett neu laden
+        source = state.source_signature()
+        stored = self.get_meta('accounts_source')
+        if stored == source:
+            if state.db_signature != source:
+                state.mark_synced()
+            return False
+        changed = state.entries_since(stored)
+        if changed is None:
+            self.load_accounts(state.seen_entries.values())
+        else:
+            self.upsert_accounts(changed)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('accounts_source', ?)", (source,))
+        state.mark_synced()
+        return True
+
+    def load_accounts(self, accounts):
+        # Indizes erst nach dem Massenimport neu aufbauen und in großen Transaktionen schreiben
+        connection = self.connection
+        with connection:
+            connection.execute("DELETE FROM accounts")
+            connection.execute("DROP INDEX IF EXISTS idx_accounts_account_id")
+            connection.execute("DROP INDEX IF EXISTS idx_accounts_socialclub")
+            connection.execute("DROP INDEX IF EXISTS idx_accounts_login_time")
+        self.upsert_accounts(accounts)
+        connection.executescript(self.SCHEMA)
+
+    def upsert_accounts(self, accounts):
+        # Der Primärschlüssel entspricht dem Dublettenschlüssel, INSERT OR REPLACE überschreibt also geänderte Einträge
+        connection = self.connection
+        rows = (
+            (a.username, a.account_id, a.socialclub, a.login_date, login_timestamp(a.login_date), a.first_login_page, a.total_logins)
+            for a in accounts
+        )
+        while True:
+            batch = list(islice(rows, self.BATCH_SIZE))
+            if not batch:
+                break
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+
+    def record_sanctions(self, sanctions):
+        submitted_at = datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (
+                submitted_at,
+                sanction['Account ID'],
+                sanction['Benutzername'],
+                sanction['Regelverstoß'],
+                sanction['Socialclubs'],
+                sanction['Sanktion'],
+                sanction.get('IP Prüfen', 'Nein'),
+                determine_level(sanction.get('total_logins', 0)),
+                sanction.get('Cluster', '')
+            )
+            for sanction in sanctions
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO sanctions (submitted_at, account_id, username, rule, socialclubs, sanction, ip_check, level, cluster) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def was_sanctioned(self, account_id):
+        return self.connection.execute("SELECT 1 FROM sanctions WHERE account_id = ? LIMIT 1", (account_id,)).fetchone() is not None
+
+    def sanction_history(self, account_id):
+        return self.connection.execute(
+            "SELECT submitted_at, rule, sanction FROM sanctions WHERE account_id = ? ORDER BY id",
+            (account_id,)
+        ).fetchall()
+
+    def socialclubs_for_account(self, account_id):
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT socialclub FROM accounts WHERE account_id = ?", (account_id,)
+        )]
+
+    def accounts_for_socialclub(self, socialclub):
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT account_id FROM accounts WHERE socialclub = ?", (socialclub,)
+        )]
+
+    def window_start(self, days):
+        # Wie SanctionIndex.window(): gemessen am neuesten Login, nicht lesbare Zeiten (-1) fallen heraus
+        newest = self.connection.execute("SELECT MAX(login_time) FROM accounts").fetchone()[0]
+        return max((newest or 0) - days * 86400, 0)
+
+    def accounts_with_multiple_socialclubs(self, min_count=2, require_shared=False, since=None):
+        # Kandidaten für Regeln mit Group = account (§1.1); der Index (account_id, socialclub) deckt die Abfrage ab
+        where, params = ("WHERE login_time >= ?", [since]) if since is not None else ("", [])
+        query = f"SELECT account_id FROM accounts {where} GROUP BY account_id HAVING COUNT(DISTINCT socialclub) >= ?"
+        params.append(min_count)
+        if require_shared:
+            query += (
+                f" AND MAX(socialclub IN (SELECT socialclub FROM accounts {where}"
+                " GROUP BY socialclub HAVING COUNT(DISTINCT account_id) > 1))"
+            )
+            params += params[:-1]
+        return [row[0] for row in self.connection.execute(query, params)]
+
+    def crowded_socialclubs(self, min_count=3, count='entries', since=None):
+        # Kandidaten für Regeln mit Group = socialclub (§1.4), gezählt wie in SanctionIndex.evaluate_socialclub
+        where, params = ("WHERE login_time >= ?", [since]) if since is not None else ("", [])
+        counted = "COUNT(*)" if count == 'entries' else "COUNT(DISTINCT account_id)"
+        return [row[0] for row in self.connection.execute(
+            f"SELECT socialclub FROM accounts {where} GROUP BY socialclub HAVING {counted} >= ?", params + [min_count]
+        )]
+
+    def rule_candidates(self, rule, since=None):
+        # Account-IDs bzw. Socialclubs, die die Schwelle der Regel erreichen
+        if rule.group == 'account':
+            return self.accounts_with_multiple_socialclubs(rule.min_count, rule.require_shared, since)
+        return self.crowded_socialclubs(rule.min_count, rule.count, since)
+
+class SubmittedSanctions:
+    """
+    Fingerabdrücke bereits abgeschickter Sanktionen für den Delta-Modus.
+    Pro Sanktion wird nur ein Hash aus Account ID, Regelverstoß und Sanktion (ohne Login-Zahl) gespeichert,
+    dazu die höchste abgeschickte Priorität pro Account; die Datei ist eine Anhängeliste fester Länge.
+    """
+
+    RECORD = struct.Struct('<8s8sH')
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprints = set()
+        self.account_priority = {}
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b''
+        # Ein nach einem Absturz abgeschnittener letzter Datensatz wird verworfen, sonst wären alle folgenden verschoben
+        if len(data) % self.RECORD.size:
+            data = data[:len(data) - len(data) % self.RECORD.size]
+            with open(path, 'r+b') as file:
+                file.truncate(len(data))
+        for account_key, fingerprint, priority in self.RECORD.iter_unpack(data):
+            self.fingerprints.add(fingerprint)
+            self.account_priority[account_key] = max(priority, self.account_priority.get(account_key, 0))
+
+    @staticmethod
+    def account_key(account_id):
+        return hashlib.blake2b(account_id.encode('utf-8'), digest_size=8).digest()
+
+    @staticmethod
+    def fingerprint(sanction):
+        text = f"{sanction['Account ID']}\0{sanction['Regelverstoß']}\0{sanction.get('label', sanction['Sanktion'])}"
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+    def is_new(self, sanction):
+        # Neu: Account noch nie abgeschickt. Verschärft: höhere Priorität als alles bisher Abgeschickte.
+        # Eine weitere Regel ohne schärfere Sanktion für einen bereits sanktionierten Account zählt nicht.
+        if self.fingerprint(sanction) in self.fingerprints:
+            return False
+        previous = self.account_priority.get(self.account_key(sanction['Account ID']))
+        return previous is None or sanction.get('priority', 0) > previous
+
+    def new_results(self, sanctions_1_1, sanctions_1_4, combined_sanctions):
+        # Gleiche Struktur wie SanctionIndex.results(), nur mit neuen und verschärften Sanktionen
+        new_1_4 = {}
+        for socialclub, sanctions in sanctions_1_4.items():
+            kept = [sanction for sanction in sanctions if self.is_new(sanction)]
+            if kept:
+                new_1_4[socialclub] = kept
+        return (
+            [sanction for sanction in sanctions_1_1 if self.is_new(sanction)],
+            new_1_4,
+            [sanction for sanction in combined_sanctions if self.is_new(sanction)]
+        )
+
+    def record(self, sanctions):
+        records = []
+        for sanction in sanctions:
+            fingerprint = self.fingerprint(sanction)
+            if fingerprint in self.fingerprints:
+                continue
+            account_key = self.account_key(sanction['Account ID'])
+            priority = min(sanction.get('priority', 0), 0xFFFF)
+            self.fingerprints.add(fingerprint)
+            self.account_priority[account_key] = max(priority, self.account_priority.get(account_key, 0))
+            records.append(self.RECORD.pack(account_key, fingerprint, priority))
+        if records:
+            with open(self.path, 'ab') as file:
+                file.write(b''.join(records))
+        return len(records)
+
+def open_submitted():
+    submitted_path = config['DEFAULT'].get('SubmittedFile', 'submitted_sanctions.bin')
+    return SubmittedSanctions(submitted_path) if submitted_path else None
+
+def delta_mode():
+    return submitted is not None and config['DEFAULT'].getboolean('DeltaMode', fallback=False)
+
+def delta_results(results):
+    # Im Delta-Modus nur neue und verschärfte Sanktionen in GUI und Export übernehmen
+    if not delta_mode():
+        return results
+    with metrics.stage('delta'):
+        return submitted.new_results(*results)
+
+def record_submitted(sanctions):
+    if submitted is not None:
+        try:
+            submitted.record(sanctions)
+        except OSError as e:
+            log_action(f"Abgeschickte Sanktionen konnten nicht vermerkt werden: {e}")
+
+def open_database():
+    database_path = config['DEFAULT'].get('DatabasePath', '')
+    return SanctionDatabase(database_path) if database_path else None
+
+def sync_database(database, state):
+    if database is not None:
+        try:
+            with metrics.stage('database'):
+                synced = database.sync_accounts(state)
+            if synced:
+                log_action(f"Accounts in {database.path} aktualisiert")
+        except Exception as e:
+            log_action(f"Datenbank konnte nicht aktualisiert werden: {e}")
 
 def show_summary(sanctions_1_1, sanctions_1_4, combined_sanctions):
+    account_names, socialclub_names, all_names = active_rules().section_names()
     summary = (
         f"Zusammenfassung der Sanktionen:\n\n"
-        f"§1.1 Verstöße: {len(sanctions_1_1)}\n"
-        f"§1.4 Verstöße: {sum(len(v) for v in sanctions_1_4.values())}\n"
-        f"Kombinierte Verstöße (§1.1 und §1.4): {len(combined_sanctions)}"
+        f"{account_names} Verstöße: {len(sanctions_1_1)}\n"
+        f"{socialclub_names} Verstöße: {sum(len(v) for v in sanctions_1_4.values())}\n"
+        f"Kombinierte Verstöße ({all_names}): {len(combined_sanctions)}"
     )
+    if metrics.last is not None:
+        summary += "\n\n" + metrics.summary_text()
     messagebox.showinfo("Zusammenfassung", summary)
 
+class SubstringIndex:
+    """
+    Trigramm-Index über Account ID und Socialclubs für schnelle Teilstring-Suche.
+    Kürzere Suchbegriffe fallen auf einen Scan über die gespeicherten Texte zurück.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        self.texts = {}
+        self.grams = defaultdict(set)
+        self.last_query = None
+        self.last_result = None
+
+    def add(self, key, *texts):
+        self.texts[key] = texts
+        for text in texts:
+            for i in range(len(text) - self.GRAM_SIZE + 1):
+                self.grams[text[i:i + self.GRAM_SIZE]].add(key)
+
+    def search(self, query):
+        # Beim Weitertippen genügt es, das letzte Ergebnis nachzuprüfen
+        if self.last_query is not None and self.last_query in query:
+            candidates = self.last_result
+        elif len(query) < self.GRAM_SIZE:
+            candidates = self.texts.keys()
+        else:
+            gram_sets = sorted(
+                (self.grams.get(query[i:i + self.GRAM_SIZE], set()) for i in range(len(query) - self.GRAM_SIZE + 1)),
+                key=len
+            )
+            candidates = set.intersection(*gram_sets)
+        result = {key for key in candidates if any(query in text for text in self.texts[key])}
+        self.last_query = query
+        self.last_result = result
+        return result
+
+def build_filter_index():
+    global filter_index
+    filter_index = SubstringIndex()
+    for row_id, row in row_state.items():
+        filter_index.add(row_id, row.sanction['Account ID'], row.sanction.get('Socialclubs', ''), row.sanction.get('Cluster', ''))
+
+def visible_row_ids():
+    # None bedeutet: kein Filter aktiv, alle Zeilen sichtbar
+    queries = active_filters + ([live_filter.get()] if live_filter.get() else [])
+    if not queries:
+        return None
+    visible = None
+    for query in queries:
+        matches = filter_index.search(query)
+        visible = matches if visible is None else visible & matches
+    return visible
+
 def apply_filter():
-    global sanctions_1_1, sanctions_1_4, combined_sanctions
+    # Filter werden gestapelt und nur auf die Ansicht angewendet; die Sanktionen selbst bleiben vollständig
     filter_id = simpledialog.askstring("Filter", "Geben Sie die Account-ID oder Socialclub ein, nach der gefiltert werden soll:")
     if not filter_id:
         return
+    active_filters.append(filter_id)
+    render_rows()
+
+def clear_filters():
+    active_filters.clear()
+    live_filter.set('')
+    render_rows()
+
+def on_live_filter_change(*args):
+    # Beim Tippen erst nach einer kurzen Pause neu zeichnen
+    global live_filter_job
+    if live_filter_job is not None:
+        root.after_cancel(live_filter_job)
+    live_filter_job = root.after(150, run_live_filter)
+
+def run_live_filter():
+    global live_filter_job
+    live_filter_job = None
+    render_rows()
+
+class ActionLogWriter:
+    """
+    Gepuffertes Schreiben der Log-Datei aus einem Hintergrund-Thread.
+    Zeilen werden gesammelt und nach flush_lines Zeilen oder flush_interval Sekunden geschrieben;
+    die Datei wird nach Größe und/oder Tag rotiert, es bleiben backup_count alte Dateien erhalten.
+    """
 
-    filtered_1_1, filtered_1_4 = filter_sanctions(sanctions_1_1, sanctions_1_4, filter_id)
-    filtered_combined = [s for s in combined_sanctions if filter_id in s['Account ID'] or filter_id in s['Socialclubs']]
-
-    sanctions_1_1 = filtered_1_1
-    sanctions_1_4 = filtered_1_4
-    combined_sanctions = filtered_combined
-    refresh_gui()
-
-def filter_sanctions(sanctions_1_1, sanctions_1_4, filter_id):
-    filtered_1_1 = [s for s in sanctions_1_1 if filter_id in s['Account ID'] or filter_id in s['Socialclubs']]
-    filtered_1_4 = defaultdict(list)
-    for socialclub, sanctions in sanctions_1_4.items():
-        filtered_sanctions = [s for s in sanctions if filter_id in s['Account ID'] or filter_id in s['Socialclubs']]
-        if filtered_sanctions:
-            filtered_1_4[socialclub] = filtered_sanctions
-
-    return filtered_1_1, filtered_1_4
-
-def log_action(action):
-    log_file_path = config['DEFAULT']['LogFilePath']
-    with open(log_file_path, 'a') as log_file:
-        log_file.write(f"{datetime.now()} - {action}\n")
+    STOP = object()
+
+    def __init__(self, path, max_bytes=0, rotate_daily=False, backup_count=5, flush_interval=1.0, flush_lines=1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.flush_lines = flush_lines
+        self.queue = queue.SimpleQueue()
+        self.file = None
+        self.thread = threading.Thread(target=self._run, name='LogTool-Log', daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def flush(self, timeout=5.0):
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self.thread.is_alive():
+            self.queue.put(self.STOP)
+            self.thread.join(timeout)
+
+    def _run(self):
+        buffer = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, str):
+                buffer.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(buffer) < self.flush_lines:
+                    continue
+            if buffer:
+                self._write(buffer)
+                buffer = []
+            deadline = None
+            if item is self.STOP:
+                if self.file is not None:
+                    self.file.close()
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write(self, lines):
+        try:
+            if self.file is None:
+                self._open()
+            if self._needs_rotation(sum(len(line) for line in lines)):
+                self._rotate()
+            self.file.write(''.join(lines))
+            self.file.flush()
+        except OSError as e:
+            # Log-Fehler dürfen die Anwendung nicht stören; die Zeilen gehen dann verloren
+            print(f"Log konnte nicht geschrieben werden: {e}", file=sys.stderr)
+            self.file = None
+
+    def _open(self):
+        self.file = open(self.path, 'a')
+        size = self.file.tell()
+        self.opened_day = datetime.fromtimestamp(os.path.getmtime(self.path)).date() if size else datetime.now().date()
+
+    def _needs_rotation(self, pending):
+        size = self.file.tell()
+        if size == 0:
+            return False
+        if self.rotate_daily and datetime.now().date() != self.opened_day:
+            return True
+        return self.max_bytes > 0 and size + pending > self.max_bytes
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+def get_action_log():
+    global action_log
+    if action_log is None:
+        settings = config['DEFAULT']
+        action_log = ActionLogWriter(
+            settings.get('LogFilePath', 'sanktionen_log.txt'),
+            max_bytes=settings.getint('LogMaxMB', 10) << 20,
+            rotate_daily=settings.getboolean('LogRotateDaily', False),
+            backup_count=settings.getint('LogBackupCount', 5)
+        )
+        atexit.register(close_log)
+    return action_log
+
+def close_log():
+    global action_log
+    if action_log is not None:
+        action_log.close()
+        action_log = None
+
+def log_action(action, flush=False):
+    # Schreibt nicht mehr direkt, sondern über den Log-Thread; Fehler werden sofort auf die Platte gebracht
+    log = get_action_log()
+    log.write(f"{datetime.now()} - {action}\n")
+    if flush:
+        log.flush()
+
+def show_clusters():
+    # Übersicht der Account-Ringe (Komponenten mit mehreren Accounts), aufklappbar bis zu den Accounts
+    if reload_thread is not None:
+        messagebox.showinfo("Information", "Die Daten werden gerade neu geladen. Bitte warten.")
+        return
+    clusters = acp_state.active_index().clusters_summary()
+    window = tk.Toplevel(root)
+    window.title("Cluster")
+
+    cluster_tree = ttk.Treeview(window, columns=('accounts', 'socialclubs', 'sanctioned'))
+    cluster_tree.heading('#0', text="Cluster / Account ID")
+    cluster_tree.heading('accounts', text="Accounts")
+    cluster_tree.heading('socialclubs', text="Socialclubs")
+    cluster_tree.heading('sanctioned', text="Sanktioniert")
+    cluster_tree.column('accounts', width=80, anchor='center')
+    cluster_tree.column('socialclubs', width=300)
+    cluster_tree.column('sanctioned', width=90, anchor='center')
+    for cluster in clusters:
+        parent = cluster_tree.insert('', 'end', text=cluster['Cluster'], values=(len(cluster['Accounts']), len(cluster['Socialclubs']), len(cluster['Sanktioniert'])))
+        sanctioned = set(cluster['Sanktioniert'])
+        for account_id in cluster['Accounts']:
+            cluster_tree.insert(parent, 'end', text=account_id, values=('', ', '.join(acp_state.active_index().account_map[account_id]), 'Ja' if account_id in sanctioned else 'Nein'))
+    cluster_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    scrollbar = ttk.Scrollbar(window, orient="vertical", command=cluster_tree.yview)
+    scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+    cluster_tree.configure(yscrollcommand=scrollbar.set)
+
+    export_button = tk.Button(window, text="Exportieren", command=lambda: export_clusters_command(clusters), font=('Arial', 10), bg='#f0f0f0')
+    export_button.pack(padx=10, pady=10, anchor='n')
+
+def export_clusters_command(clusters):
+    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[('CSV files', '*.csv'), ('All files', '*.*')])
+    if file_path:
+        write_clusters_csv(clusters, file_path)
+        log_action(f"Cluster in {file_path} exportiert")
+        messagebox.showinfo("Erfolg", f"Cluster in {file_path} exportiert.")
 
 def show_sanction_details(sanction):
-    details = f"Regelverstoß: {sanction['Regelverstoß']}\nAccount ID: {sanction['Account ID']}\nBenutzername: {sanction['Benutzername']}\nSocialclubs: {sanction['Socialclubs']}\nSanktion: {sanction['Sanktion']}"
+    details = f"Regelverstoß: {sanction['Regelverstoß']}\nAccount ID: {sanction['Account ID']}\nBenutzername: {sanction['Benutzername']}\nSocialclubs: {sanction['Socialclubs']}\nSanktion: {sanction['Sanktion']}\nCluster: {sanction.get('Cluster', '')}"
+    if database is not None:
+        history = database.sanction_history(sanction['Account ID'])
+        if history:
+            details += "\n\nBereits sanktioniert:\n" + "\n".join(f"{submitted_at}: {sanction_text} ({rule})" for submitted_at, rule, sanction_text in history)
+        else:
+            details += "\n\nBisher nicht sanktioniert"
     messagebox.showinfo("Sanktionsdetails", details)
 
-def remove_sanction(socialclub, sanction_to_remove):
-    global sanctions_1_1, sanctions_1_4, combined_sanctions
-    if socialclub:
-        sanctions_1_4[socialclub] = [s for s in sanctions_1_4[socialclub] if s != sanction_to_remove]
-        if not sanctions_1_4[socialclub]:
-            del sanctions_1_4[socialclub]
+def remove_sanction(row_id):
+    global sanctions_1_1, combined_sanctions
+    row = row_state.pop(row_id)
+    if row.section == '1_4':
+        sanctions_1_4[row.socialclub] = [s for s in sanctions_1_4[row.socialclub] if s is not row.sanction]
+        if not sanctions_1_4[row.socialclub]:
+            del sanctions_1_4[row.socialclub]
+    elif row.section == '1_1':
+        sanctions_1_1 = [s for s in sanctions_1_1 if s is not row.sanction]
     else:
-        combined_sanctions = [s for s in combined_sanctions if s != sanction_to_remove]
-    refresh_gui()
+        combined_sanctions = [s for s in combined_sanctions if s is not row.sanction]
+
+    # Nur die betroffene Zeile (und leere Gruppen) aus dem Treeview entfernen
+    parent = tree.parent(row_id)
+    tree.delete(row_id)
+    while parent and not tree.get_children(parent):
+        grandparent = tree.parent(parent)
+        tree.delete(parent)
+        parent = grandparent
 
 def determine_level(logins):
-    if logins < 10:
-        return "Level 1"
-    elif logins < 30:
-        return "Level 2"
-    elif logins <= 50:
-        return "Level 3"
-    elif logins <= 100:  # Bereich von 51 bis 100
-        return "Level 4"
-    elif logins > 100:
-        return "Level 5" 
+    # Level-Grenzen aus [Levels] der Regeldatei
+    return active_rules().level(logins)
+
+class SanctionRow:
+    # Auswahl- und "IP Prüfen"-Zustand einer Zeile, unabhängig von den Widgets
+    __slots__ = ('sanction', 'section', 'socialclub', 'selected', 'ip_check')
+
+    def __init__(self, sanction, section, socialclub=None):
+        self.sanction = sanction
+        self.section = section
+        self.socialclub = socialclub
+        self.selected = True
+        self.ip_check = False
+
+def checkbox_text(value):
+    return '☑' if value else '☐'
+
+def build_rows():
+    # Eine Zeile pro Sanktion in der Reihenfolge der Anzeige; die Zeilen-ID ist zugleich die Treeview-iid
+    row_state.clear()
+    for sanction in sanctions_1_1:
+        row_state[str(len(row_state))] = SanctionRow(sanction, '1_1')
+    for socialclub, sanctions in sanctions_1_4.items():
+        for sanction in sanctions:
+            row_state[str(len(row_state))] = SanctionRow(sanction, '1_4', socialclub)
+    for sanction in combined_sanctions:
+        row_state[str(len(row_state))] = SanctionRow(sanction, 'combined')
+
+def row_values(row):
+    sanction = row.sanction
+    if row.section == '1_4':
+        info = sanction['Sanktion']
     else:
-        return "Unbekannt"
+        info = f"Socialclubs: {sanction.get('Socialclubs', 'Unbekannt')}"
+    # Level basierend auf den Logins
+    level = determine_level(sanction.get('total_logins', 0))
+    return (checkbox_text(row.selected), sanction['Regelverstoß'], info, checkbox_text(row.ip_check), level, sanction.get('Cluster', ''))
+
+def row_tags(row):
+    if row.section == 'combined':
+        return ('combined',)
+    if row.section == '1_4' and row.sanction.get('priority') == active_rules().max_priority:
+        return ('permanent',)
+    return ()
 
 def refresh_gui():
-    for widget in scroll_frame.winfo_children():
-        widget.destroy()
-    check_vars.clear()
-    sanction_buttons.clear()
-
-    # Anzeige für §1.1-Sanktionen
-    if sanctions_1_1:
-        lbl_1_1 = tk.Label(scroll_frame, text="Sanktionen für §1.1", bg='#e0e0e0', font=('Arial', 12, 'bold'))
-        lbl_1_1.pack(anchor='w', pady=(10, 0))
-        for sanction in sanctions_1_1:
-            var = tk.BooleanVar(value=True)
-            ip_check_var = tk.BooleanVar(value=False)  # Kontrollkästchen für "IP Prüfen"
-            check_vars.append((var, sanction, ip_check_var))
-
-            # Level basierend auf den Logins
-            logins = sanction.get('total_logins', 0)
-            level = determine_level(logins)
-
-            frame = tk.Frame(scroll_frame, bg='#ffffff', relief=tk.RAISED, borderwidth=1)
-            frame.pack(anchor='w', padx=10, pady=5, fill='x')
-
-            cb = tk.Checkbutton(frame, text=f"{sanction['Account ID']} - {sanction['Regelverstoß']} - Socialclubs: {sanction.get('Socialclubs', 'Unbekannt')}", variable=var, onvalue=True, offvalue=False, bg='#ffffff', font=('Arial', 10))
-            cb.pack(side='left', padx=5)
-
-            btn_details = tk.Button(frame, text="Details", command=lambda s=sanction: show_sanction_details(s), font=('Arial', 10), bg='#f0f0f0')
-            btn_details.pack(side='left', padx=5)
-
-            btn_remove = tk.Button(frame, text="Entfernen", command=lambda s=sanction: remove_sanction(None, s), font=('Arial', 10), bg='#f0f0f0')
-            btn_remove.pack(side='left', padx=5)
-
-            # Kontrollkästchen für "IP Prüfen"
-            ip_check = tk.Checkbutton(frame, text="IP Prüfen", variable=ip_check_var, onvalue=True, offvalue=False, bg='#ffffff', font=('Arial', 10))
-            ip_check.pack(side='left', padx=5)
-
-            # Level anzeigen
-            lbl_level = tk.Label(frame, text=level, bg='#ffffff', font=('Arial', 10))
-            lbl_level.pack(side='left', padx=5)
-
-            sanction_buttons.append((btn_details, btn_remove))
-
-    # Anzeige für §1.4-Sanktionen
-    if sanctions_1_4:
-        lbl_1_4 = tk.Label(scroll_frame, text="Sanktionen für §1.4", bg='#e0e0e0', font=('Arial', 12, 'bold'))
-        lbl_1_4.pack(anchor='w', pady=(10, 0))
-        for socialclub, sanctions in sanctions_1_4.items():
-            lbl_socialclub = tk.Label(scroll_frame, text=f"Socialclub: {socialclub}", bg='#d0d0d0', font=('Arial', 11, 'bold'))
-            lbl_socialclub.pack(anchor='w', pady=(5, 0), padx=20)
-            for sanction in sanctions:
-                var = tk.BooleanVar(value=True)
-                ip_check_var = tk.BooleanVar(value=False)  # Kontrollkästchen für "IP Prüfen"
-                check_vars.append((var, sanction, ip_check_var))
-
-                # Level basierend auf den Logins
-                logins = sanction.get('total_logins', 0)
-                level = determine_level(logins)
-
-                frame = tk.Frame(scroll_frame, bg='#ffffff', relief=tk.RAISED, borderwidth=1)
-                frame.pack(anchor='w', padx=10, pady=5, fill='x')
-
-                cb = tk.Checkbutton(frame, text=f"{sanction['Account ID']} - {sanction['Regelverstoß']} - {sanction['Sanktion']}", variable=var, onvalue=True, offvalue=False, fg='red' if 'Permanenter Bann' in sanction['Sanktion'] else 'black', bg='#ffffff', font=('Arial', 10))
-                cb.pack(side='left', padx=5)
-
-                btn_details = tk.Button(frame, text="Details", command=lambda s=sanction: show_sanction_details(s), font=('Arial', 10), bg='#f0f0f0')
-                btn_details.pack(side='left', padx=5)
-
-                btn_remove = tk.Button(frame, text="Entfernen", command=lambda s=sanction: remove_sanction(socialclub, s), font=('Arial', 10), bg='#f0f0f0')
-                btn_remove.pack(side='left', padx=5)
-
-                # Kontrollkästchen für "IP Prüfen"
-                ip_check = tk.Checkbutton(frame, text="IP Prüfen", variable=ip_check_var, onvalue=True, offvalue=False, bg='#ffffff', font=('Arial', 10))
-                ip_check.pack(side='left', padx=5)
-
-                # Level anzeigen
-                lbl_level = tk.Label(frame, text=level, bg='#ffffff', font=('Arial', 10))
-                lbl_level.pack(side='left', padx=5)
-
-                sanction_buttons.append((btn_details, btn_remove))
-
-    # Anzeige für kombinierte Sanktionen
-    if combined_sanctions:
-        lbl_combined = tk.Label(scroll_frame, text="Kombinierte Sanktionen für §1.1 und §1.4", bg='#e0e0e0', font=('Arial', 12, 'bold'))
-        lbl_combined.pack(anchor='w', pady=(10, 0))
-        for sanction in combined_sanctions:
-            var = tk.BooleanVar(value=True)
-            ip_check_var = tk.BooleanVar(value=False)  # Kontrollkästchen für "IP Prüfen"
-            check_vars.append((var, sanction, ip_check_var))
-
-            # Level basierend auf den Logins
-            logins = sanction.get('total_logins', 0)
-            level = determine_level(logins)
-
-            frame = tk.Frame(scroll_frame, bg='#ffffff', relief=tk.RAISED, borderwidth=1)
-            frame.pack(anchor='w', padx=10, pady=5, fill='x')
-
-            cb = tk.Checkbutton(frame, text=f"{sanction['Account ID']} - {sanction['Regelverstoß']} - Socialclubs: {sanction.get('Socialclubs', 'Unbekannt')}", variable=var, onvalue=True, offvalue=False, fg='blue', bg='#ffffff', font=('Arial', 10))
-            cb.pack(side='left', padx=5)
+    with metrics.stage('refresh_gui'):
+        build_rows()
+        build_filter_index()
+        render_rows()
+
+def render_rows():
+    # Der Treeview zeichnet nur die sichtbaren Zeilen; pro Sanktion entsteht kein eigenes Widget mehr
+    tree.delete(*tree.get_children())
+    visible = visible_row_ids()
+
+    account_names, socialclub_names, all_names = active_rules().section_names()
+    section_titles = {
+        '1_1': f"Sanktionen für {account_names}",
+        '1_4': f"Sanktionen für {socialclub_names}",
+        'combined': f"Kombinierte Sanktionen für {all_names}"
+    }
+    for row_id, row in row_state.items():
+        if visible is not None and row_id not in visible:
+            continue
+        parent = 'section_' + row.section
+        if not tree.exists(parent):
+            tree.insert('', 'end', iid=parent, text=section_titles[row.section], open=True, tags=('section',))
+        if row.socialclub is not None:
+            sc_parent = 'socialclub_' + row.socialclub
+            if not tree.exists(sc_parent):
+                tree.insert(parent, 'end', iid=sc_parent, text=f"Socialclub: {row.socialclub}", open=True, tags=('socialclub',))
+            parent = sc_parent
+        tree.insert(parent, 'end', iid=row_id, text=row.sanction['Account ID'], values=row_values(row), tags=row_tags(row))
+
+    if active_filters:
+        filter_label.config(text="Aktive Filter: " + ' + '.join(active_filters))
+    else:
+        filter_label.config(text="")
 
-            btn_details = tk.Button(frame, text="Details", command=lambda s=sanction: show_sanction_details(s), font=('Arial', 10), bg='#f0f0f0')
-            btn_details.pack(side='left', padx=5)
+def update_row(row_id):
+    tree.item(row_id, values=row_values(row_state[row_id]))
 
-            btn_remove = tk.Button(frame, text="Entfernen", command=lambda s=sanction: remove_sanction(None, s), font=('Arial', 10), bg='#f0f0f0')
-            btn_remove.pack(side='left', padx=5)
+def focused_row_id():
+    row_id = tree.focus()
+    return row_id if row_id in row_state else None
 
-            # Kontrollkästchen für "IP Prüfen"
-            ip_check = tk.Checkbutton(frame, text="IP Prüfen", variable=ip_check_var, onvalue=True, offvalue=False, bg='#ffffff', font=('Arial', 10))
-            ip_check.pack(side='left', padx=5)
+def on_tree_click(event):
+    row_id = tree.identify_row(event.y)
+    if row_id not in row_state or tree.identify_region(event.x, event.y) != 'cell':
+        return
+    column = tree.column(tree.identify_column(event.x), 'id')
+    row = row_state[row_id]
+    if column == 'selected':
+        row.selected = not row.selected
+    elif column == 'ip_check':
+        row.ip_check = not row.ip_check
+    else:
+        return
+    update_row(row_id)
+
+def toggle_focused_row(event=None):
+    row_id = focused_row_id()
+    if row_id is not None:
+        row_state[row_id].selected = not row_state[row_id].selected
+        update_row(row_id)
+
+def show_focused_details(event=None):
+    row_id = focused_row_id()
+    if row_id is not None:
+        show_sanction_details(row_state[row_id].sanction)
+
+def remove_focused_sanction(event=None):
+    row_id = focused_row_id()
+    if row_id is not None:
+        remove_sanction(row_id)
+
+def collect_selected_sanctions():
+    # Wie früher gelten bei aktivem Filter nur die angezeigten Sanktionen
+    visible = visible_row_ids()
+    selected_sanctions = []
+    selected_ids = set()
+    visible_combined = []
+    for row_id, row in row_state.items():
+        if visible is not None and row_id not in visible:
+            continue
+        sanction = row.sanction
+        if row.section == 'combined':
+            visible_combined.append(sanction)
+        if row.selected and sanction['Account ID'] not in selected_ids:
+            # Füge die IP-Prüfen Information zu den Sanktionen hinzu
+            sanction['IP Prüfen'] = 'Ja' if row.ip_check else 'Nein'
+            selected_sanctions.append(sanction)
+            selected_ids.add(sanction['Account ID'])
+    selected_sanctions.extend(visible_combined)  # Füge kombinierte Sanktionen hinzu
+    return selected_sanctions
+
+def reload_data(status="Lade Daten neu ..."):
+    # Einlesen und Auswerten laufen im Worker-Thread; bis zum Ergebnis bleiben die bisherigen Sanktionen sichtbar
+    global reload_thread, reload_cancel
+    if reload_thread is not None:
+        return
+    messages = queue.SimpleQueue()
+    reload_cancel = threading.Event()
+    cancel_event = reload_cancel
+    database_path = database.path if database is not None else None
+
+    metrics.reset()
+    reload_button.config(state=tk.DISABLED)
+    reload_progress.configure(maximum=1.0, value=0)
+    reload_status.config(text=status)
+    reload_bar.pack(side=tk.BOTTOM, fill=tk.X, before=filter_bar)
+
+    def worker():
+        try:
+            # Nur die seit dem letzten Laden angehängten Zeilen werden verarbeitet
+            results = delta_results(acp_state.refresh(progress=lambda text, fraction: messages.put(('progress', text, fraction)), cancel_event=cancel_event))
+            if database_path is not None:
+                # sqlite3-Verbindungen sind an ihren Thread gebunden, daher eine eigene Verbindung
+                messages.put(('progress', "Datenbank wird aktualisiert ...", 1.0))
+                worker_database = SanctionDatabase(database_path)
+                try:
+                    sync_database(worker_database, acp_state)
+                finally:
+                    worker_database.close()
+            messages.put(('done', results))
+        except ReloadCancelled:
+            messages.put(('cancelled',))
+        except Exception as e:
+            messages.put(('error', e))
+
+    def poll():
+        global reload_thread, sanctions_1_1, sanctions_1_4, combined_sanctions
+        result = None
+        while result is None:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                reload_status.config(text=message[1])
+                reload_progress.configure(value=message[2])
+            else:
+                result = message
+        if result is None:
+            root.after(100, poll)
+            return
+        reload_thread = None
+        reload_bar.pack_forget()
+        reload_button.config(state=tk.NORMAL)
+        if result[0] == 'done':
+            sanctions_1_1, sanctions_1_4, combined_sanctions = result[1]
+            refresh_gui()
+            log_action("Daten neu eingelesen und GUI aktualisiert")
+            metrics.report("Daten neu laden")
+        elif result[0] == 'cancelled':
+            log_action("Neu laden abgebrochen")
+            metrics.reset()
+        else:
+            messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten: {result[1]}")
+            log_action(f"Fehler aufgetreten: {result[1]}", flush=True)
 
-            # Level anzeigen
-            lbl_level = tk.Label(frame, text=level, bg='#ffffff', font=('Arial', 10))
-            lbl_level.pack(side='left', padx=5)
+    reload_thread = threading.Thread(target=worker, name='LogTool-Reload', daemon=True)
+    reload_thread.start()
+    root.after(100, poll)
 
-            sanction_buttons.append((btn_details, btn_remove))
+def window_label(days):
+    return "Alle" if not days else f"{days} Tage"
 
-def reload_data():
-    try:
-        with open('acp_data.txt', 'r') as file:
-            acp_data = file.read()
-        accounts = parse_acp_data(acp_data)
-        global sanctions_1_1, sanctions_1_4, combined_sanctions
-        sanctions_1_1, sanctions_1_4, combined_sanctions = check_sanctions(accounts)
-        refresh_gui()
-        log_action("Daten neu eingelesen und GUI aktualisiert")
-    except Exception as e:
-        messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten: {e}")
-        log_action(f"Fehler aufgetreten: {e}")
+def change_window(event=None):
+    # Nur der Zeitraum wird neu ausgewertet; die Login-Zeiten sind bereits geparst, die Dateien bleiben unberührt
+    days = 0 if window_choice.get() == "Alle" else int(window_choice.get().split()[0])
+    if reload_thread is not None:
+        window_choice.set(window_label(acp_state.window_days))
+        return
+    if days == acp_state.window_days:
+        return
+    acp_state.set_window(days)
+    log_action(f"Zeitraum geändert: {window_label(days)}")
+    reload_data(f"Werte Zeitraum aus: {window_label(days)} ...")
+
+def cancel_reload():
+    if reload_thread is not None:
+        reload_cancel.set()
+        reload_status.config(text="Wird abgebrochen ...")
+
+def wait_for_reload(timeout=10.0):
+    # Beim Schließen einen laufenden Reload abbrechen; der Zustand darf erst danach gespeichert werden
+    if reload_thread is None:
+        return True
+    reload_cancel.set()
+    reload_thread.join(timeout)
+    return not reload_thread.is_alive()
 
 def show_gui_and_select_sanctions(sanctions_1_1_data, sanctions_1_4_data, combined_sanctions_data):
-    global root, scroll_frame, check_vars, sanction_buttons, sanctions_1_1, sanctions_1_4, combined_sanctions
+    global root, tree, row_state, sanctions_1_1, sanctions_1_4, combined_sanctions
+    global filter_label, live_filter, live_filter_job, active_filters
+    global filter_bar, reload_bar, reload_progress, reload_status, reload_button, window_choice
     sanctions_1_1 = sanctions_1_1_data
     sanctions_1_4 = sanctions_1_4_data
     combined_sanctions = combined_sanctions_data
 
     root = tk.Tk()
-    root.title("Sanktionen auswählen")
+    root.title("Sanktionen auswählen (nur neue und verschärfte)" if delta_mode() else "Sanktionen auswählen")
     root.configure(background='#e0e0e0')
     
+    filter_bar = tk.Frame(root, padx=10, pady=5, bg='#e0e0e0')
+    filter_bar.pack(fill=tk.X)
+
+    tk.Label(filter_bar, text="Suche (Account ID / Socialclub / Cluster):", bg='#e0e0e0', font=('Arial', 10)).pack(side='left')
+    live_filter = tk.StringVar()
+    live_filter_job = None
+    live_filter.trace_add('write', on_live_filter_change)
+    tk.Entry(filter_bar, textvariable=live_filter, font=('Arial', 10), width=30).pack(side='left', padx=5)
+
+    clear_filter_button = tk.Button(filter_bar, text="Filter aufheben", command=clear_filters, font=('Arial', 10), bg='#f0f0f0')
+    clear_filter_button.pack(side='left', padx=5)
+
+    filter_label = tk.Label(filter_bar, text="", bg='#e0e0e0', font=('Arial', 10))
+    filter_label.pack(side='left', padx=5)
+
+    # Zeitraum relativ zum neuesten Login; eigene Werte aus WindowDays erscheinen zusätzlich in der Liste
+    window_days = sorted(set(WINDOW_CHOICES) | {acp_state.window_days})
+    window_choice = tk.StringVar(value=window_label(acp_state.window_days))
+    window_box = ttk.Combobox(filter_bar, textvariable=window_choice, values=[window_label(days) for days in window_days], state='readonly', width=10)
+    window_box.bind('<<ComboboxSelected>>', change_window)
+    window_box.pack(side='right')
+    tk.Label(filter_bar, text="Zeitraum:", bg='#e0e0e0', font=('Arial', 10)).pack(side='right', padx=5)
+
+    active_filters = []
+
+    # Fortschrittsleiste für "Daten neu laden"; wird nur während eines Reloads eingeblendet
+    reload_bar = tk.Frame(root, padx=10, pady=5, bg='#e0e0e0')
+    reload_status = tk.Label(reload_bar, text="", bg='#e0e0e0', font=('Arial', 10), width=40, anchor='w')
+    reload_status.pack(side='left')
+    reload_progress = ttk.Progressbar(reload_bar, length=300, mode='determinate')
+    reload_progress.pack(side='left', padx=5)
+    tk.Button(reload_bar, text="Abbrechen", command=cancel_reload, font=('Arial', 10), bg='#f0f0f0').pack(side='left', padx=5)
+
     container = tk.Frame(root, padx=10, pady=10, bg='#e0e0e0')
     container.pack(fill=tk.BOTH, expand=True)
 
-    canvas = tk.Canvas(container, bg='#e0e0e0')
-    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-    scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
+    style = ttk.Style(root)
+    style.configure('Treeview', font=('Arial', 10), rowheight=24)
+    style.configure('Treeview.Heading', font=('Arial', 10, 'bold'))
+
+    tree = ttk.Treeview(container, columns=('selected', 'rule', 'info', 'ip_check', 'level', 'cluster'), selectmode='browse')
+    tree.heading('#0', text="Account ID")
+    tree.heading('selected', text="Auswahl")
+    tree.heading('rule', text="Regelverstoß")
+    tree.heading('info', text="Socialclubs / Sanktion")
+    tree.heading('ip_check', text="IP Prüfen")
+    tree.heading('level', text="Level")
+    tree.heading('cluster', text="Cluster")
+    tree.column('#0', width=260)
+    tree.column('selected', width=70, anchor='center', stretch=False)
+    tree.column('rule', width=380)
+    tree.column('info', width=300)
+    tree.column('ip_check', width=80, anchor='center', stretch=False)
+    tree.column('level', width=80, anchor='center', stretch=False)
+    tree.column('cluster', width=100, anchor='center', stretch=False)
+    tree.tag_configure('section', font=('Arial', 12, 'bold'), background='#e0e0e0')
+    tree.tag_configure('socialclub', font=('Arial', 11, 'bold'), background='#d0d0d0')
+    tree.tag_configure('permanent', foreground='red')
+    tree.tag_configure('combined', foreground='blue')
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    scrollbar = ttk.Scrollbar(container, orient="vertical", command=tree.yview)
     scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.configure(yscrollcommand=scrollbar.set)
 
-    scroll_frame = tk.Frame(canvas, bg='#e0e0e0')
-    scroll_frame.bind(
-        "<Configure>",
-        lambda e: canvas.configure(
-            scrollregion=canvas.bbox("all")
-        )
-    )
+    # Klick auf "Auswahl"/"IP Prüfen" schaltet um, Doppelklick zeigt Details
+    tree.bind('<Button-1>', on_tree_click)
+    tree.bind('<Double-1>', show_focused_details)
+    tree.bind('<space>', toggle_focused_row)
+    tree.bind('<Delete>', remove_focused_sanction)
 
-    canvas.create_window((0, 0), window=scroll_frame, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    check_vars = []
-    sanction_buttons = []
+    row_state = {}
 
     refresh_gui()
+    metrics.report("GUI-Start")
 
     submit_button = tk.Button(root, text="Submit", command=submit, relief=tk.RAISED, borderwidth=2, font=('Arial', 12), bg='#d0d0d0')
     submit_button.pack(pady=10, side='left')
@@ -392,160 +2451,530 @@ def show_gui_and_select_sanctions(sanctions_1_1_data, sanctions_1_4_data, combin
     summary_button = tk.Button(root, text="Zusammenfassung", command=lambda: show_summary(sanctions_1_1, sanctions_1_4, combined_sanctions), relief=tk.RAISED, borderwidth=2, font=('Arial', 12), bg='#d0d0d0')
     summary_button.pack(pady=10, side='left')
 
+    cluster_button = tk.Button(root, text="Cluster", command=show_clusters, relief=tk.RAISED, borderwidth=2, font=('Arial', 12), bg='#d0d0d0')
+    cluster_button.pack(pady=10, side='left')
+
+    details_button = tk.Button(root, text="Details", command=show_focused_details, relief=tk.RAISED, borderwidth=2, font=('Arial', 12), bg='#d0d0d0')
+    details_button.pack(pady=10, side='left')
+
+    remove_button = tk.Button(root, text="Entfernen", command=remove_focused_sanction, relief=tk.RAISED, borderwidth=2, font=('Arial', 12), bg='#d0d0d0')
+    remove_button.pack(pady=10, side='left')
+
     root.mainloop()
 
 def submit():
-    selected_sanctions = []
-    selected_ids = set()
-    for var, sanction, ip_check_var in check_vars:
-        if var.get():
-            if sanction['Account ID'] not in selected_ids:
-                # Füge die IP-Prüfen Information zu den Sanktionen hinzu
-                sanction['IP Prüfen'] = 'Ja' if ip_check_var.get() else 'Nein'
-                selected_sanctions.append(sanction)
-                selected_ids.add(sanction['Account ID'])
-    selected_sanctions.extend(combined_sanctions)  # Füge kombinierte Sanktionen hinzu
-    save_sanctions(selected_sanctions)
-    log_action("Sanktionen gespeichert und GUI geschlossen")
-    root.destroy()
-
-def save_sanctions(selected_sanctions):
-    # Verwende defaultdict, um Sanktionen pro Account ID zu sammeln
-    combined_sanctions = defaultdict(lambda: {
-        'Regelverstoß': set(),
-        'Socialclubs': set(),
-        'Sanktion': None,  # Halte hier die zusammengeführte Sanktion
-        'Benutzername': None,
-        'IP Prüfen': 'Nein',
-        'Level': 'Unbekannt'
-    })
-
-    # Sammle alle Informationen pro Account ID
-    for sanction in selected_sanctions:
+    selected_sanctions = collect_selected_sanctions()
+
+    def close():
+        log_action("Sanktionen gespeichert und GUI geschlossen", flush=True)
+        root.destroy()
+
+    # Das Fenster wird erst geschlossen, wenn der Export im Hintergrund fertig ist
+    save_sanctions(selected_sanctions, on_saved=close)
+
+def write_clusters_csv(clusters, file_path):
+    with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = ['Cluster', 'Anzahl Accounts', 'Anzahl Socialclubs', 'Account IDs', 'Socialclubs', 'Sanktionierte Accounts']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for cluster in clusters:
+            writer.writerow({
+                'Cluster': cluster['Cluster'],
+                'Anzahl Accounts': len(cluster['Accounts']),
+                'Anzahl Socialclubs': len(cluster['Socialclubs']),
+                'Account IDs': ', '.join(cluster['Accounts']),
+                'Socialclubs': ', '.join(cluster['Socialclubs']),
+                'Sanktionierte Accounts': ', '.join(cluster['Sanktioniert'])
+            })
+
+EXPORT_FIELDNAMES = ['Regelverstoß', 'Account ID', 'Benutzername', 'Socialclubs', 'Sanktion', 'IP Prüfen', 'Level', 'Cluster']
+EXPORT_FILETYPES = [
+    ('CSV files', '*.csv'),
+    ('JSON Lines', '*.jsonl'),
+    ('CSV (gzip)', '*.csv.gz'),
+    ('JSON Lines (gzip)', '*.jsonl.gz'),
+    ('All files', '*.*')
+]
+
+def aggregate_sanctions(sanctions):
+    # Ein Durchlauf: alle Sanktionen pro Account ID zusammenführen
+    sanctions_by_account = {}
+    for sanction in sanctions:
         account_id = sanction['Account ID']
-        combined_sanctions[account_id]['Benutzername'] = sanction['Benutzername']
-        combined_sanctions[account_id]['Regelverstoß'].add(sanction['Regelverstoß'])
-        combined_sanctions[account_id]['Socialclubs'].add(sanction['Socialclubs'])
-
-        # Kombiniere Sanktionen mit der richtigen Formatierung
-        if combined_sanctions[account_id]['Sanktion']:
-            combined_sanctions[account_id]['Sanktion'] = combine_sanction_sets(
-                combined_sanctions[account_id]['Sanktion'], sanction['Sanktion']
-            )
+        data = sanctions_by_account.get(account_id)
+        if data is None:
+            data = sanctions_by_account[account_id] = {
+                'Regelverstoß': set(),
+                'Socialclubs': set(),
+                'Sanktion': None,  # Halte hier die zusammengeführte Sanktion
+                'priority': 0,
+                'Benutzername': None,
+                'IP Prüfen': 'Nein',
+                'Level': 'Unbekannt',
+                'Cluster': ''
+            }
+        data['Benutzername'] = sanction['Benutzername']
+        data['Cluster'] = sanction.get('Cluster', '')
+        data['Regelverstoß'].add(sanction['Regelverstoß'])
+        data['Socialclubs'].add(sanction['Socialclubs'])
+
+        # Kombiniere Sanktionen über die Prioritätentabelle: die höchste Priorität gewinnt ohne Login-Angabe,
+        # Sanktionen ohne Priorität werden aneinandergehängt
+        priority = sanction.get('priority', 0)
+        if not data['Sanktion']:
+            data['Sanktion'] = sanction['Sanktion']
+        elif max(priority, data['priority']) == 0:
+            data['Sanktion'] = f"{data['Sanktion']}, {sanction['Sanktion']}"
+        elif priority > data['priority']:
+            data['Sanktion'] = sanction.get('label', sanction['Sanktion'])
         else:
-            combined_sanctions[account_id]['Sanktion'] = sanction['Sanktion']
+            data['Sanktion'] = data['label']
+        if not data['priority'] or priority > data['priority']:
+            data['priority'] = priority
+            data['label'] = sanction.get('label', sanction['Sanktion'])
 
         # Setze "IP Prüfen" auf "Ja", wenn das Kontrollkästchen aktiviert ist
         if sanction.get('IP Prüfen') == 'Ja':
-            combined_sanctions[account_id]['IP Prüfen'] = 'Ja'
+            data['IP Prüfen'] = 'Ja'
 
         # Bestimme das Level
-        logins = sanction.get('total_logins', 0)
-        combined_sanctions[account_id]['Level'] = determine_level(logins)
+        data['Level'] = determine_level(sanction.get('total_logins', 0))
+    return sanctions_by_account
+
+def export_rows(sanctions_by_account):
+    for account_id, sanction_data in sanctions_by_account.items():
+        yield {
+            'Regelverstoß': ', '.join(sanction_data['Regelverstoß']),
+            'Account ID': account_id,
+            'Benutzername': sanction_data['Benutzername'],
+            'Socialclubs': ', '.join(sanction_data['Socialclubs']),
+            'Sanktion': sanction_data['Sanktion'],
+            'IP Prüfen': sanction_data['IP Prüfen'],
+            'Level': sanction_data['Level'],
+            'Cluster': sanction_data['Cluster']
+        }
+
+def write_sanctions(sanctions, file_path, progress=None, chunk_size=5000):
+    """
+    Exportiert die Sanktionen (pro Account zusammengeführt) als CSV oder JSON Lines.
+    Das Format ergibt sich aus der Endung (.csv, .jsonl/.ndjson, jeweils optional mit .gz).
+    progress(geschrieben, gesamt) wird nach jedem Block aufgerufen.
+    """
+    start = time.perf_counter()
+    sanctions_by_account = aggregate_sanctions(sanctions)
+    total = len(sanctions_by_account)
+    base_path, extension = os.path.splitext(file_path.lower())
+    compressed = extension == '.gz'
+    if compressed:
+        extension = os.path.splitext(base_path)[1]
+    json_lines = extension in ('.jsonl', '.ndjson')
+
+    opener = gzip.open if compressed else open
+    written = 0
+    rows = export_rows(sanctions_by_account)
+    with opener(file_path, 'wt', newline='', encoding='utf-8') as output:
+        if not json_lines:
+            writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDNAMES)
+            writer.writeheader()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            if json_lines:
+                output.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in chunk))
+            else:
+                writer.writerows(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written, total)
+    metrics.add_time('export', time.perf_counter() - start)
+    return written
+
+def run_export_in_background(sanctions, file_path, on_success):
+    # Schreiben im Worker-Thread; Fortschritt und Ergebnis kommen über eine Queue zurück in den Tk-Thread
+    messages = queue.SimpleQueue()
+    sanctions = list(sanctions)
+
+    window = tk.Toplevel(root)
+    window.title("Export")
+    window.transient(root)
+    window.grab_set()
+    status_label = tk.Label(window, text=f"Exportiere nach {file_path} ...", font=('Arial', 10))
+    status_label.pack(padx=10, pady=(10, 5))
+    progress_bar = ttk.Progressbar(window, length=300, mode='determinate')
+    progress_bar.pack(padx=10, pady=(0, 10))
+
+    def worker():
+        try:
+            count = write_sanctions(sanctions, file_path, progress=lambda done, total: messages.put(('progress', done, total)))
+            messages.put(('done', count))
+        except Exception as e:
+            messages.put(('error', e))
+
+    def poll():
+        result = None
+        while result is None:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                progress_bar.configure(maximum=max(message[2], 1), value=message[1])
+                status_label.config(text=f"{message[1]} von {message[2]} Accounts geschrieben")
+            else:
+                result = message
+        if result is None:
+            root.after(100, poll)
+            return
+        window.grab_release()
+        window.destroy()
+        if result[0] == 'error':
+            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {result[1]}")
+            log_action(f"Fehler aufgetreten: {result[1]}", flush=True)
+        else:
+            metrics.report("Export")
+            on_success(result[1])
 
-    # Schreibe die kombinierten Sanktionen in die CSV-Datei
-    with open(config['DEFAULT']['DefaultExportPath'], 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Regelverstoß', 'Account ID', 'Benutzername', 'Socialclubs', 'Sanktion', 'IP Prüfen', 'Level']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+    threading.Thread(target=worker, name='LogTool-Export', daemon=True).start()
+    root.after(100, poll)
 
-        for account_id, sanction_data in combined_sanctions.items():
-            writer.writerow({
-                'Regelverstoß': ', '.join(sanction_data['Regelverstoß']),
-                'Account ID': account_id,
-                'Benutzername': sanction_data['Benutzername'],
-                'Socialclubs': ', '.join(sanction_data['Socialclubs']),
-                'Sanktion': sanction_data['Sanktion'],
-                'IP Prüfen': sanction_data['IP Prüfen'],
-                'Level': sanction_data['Level']
-            })
+def save_sanctions(selected_sanctions, on_saved=None):
+    file_path = config['DEFAULT']['DefaultExportPath']
+
+    def saved(count):
+        if database is not None:
+            database.record_sanctions(selected_sanctions)
+        record_submitted(selected_sanctions)
+        log_action(f"Sanktionen in {file_path} gespeichert")
+        messagebox.showinfo("Erfolg", "Ausgewählte Sanktionen gespeichert.")
+        if on_saved is not None:
+            on_saved()
 
-    log_action("Sanktionen in sanktionen_output.csv gespeichert")
-    messagebox.showinfo("Erfolg", "Ausgewählte Sanktionen gespeichert.")
+    run_export_in_background(selected_sanctions, file_path, saved)
 
 def export_sanctions_command():
-    selected_sanctions = []
-    selected_ids = set()
-    for var, sanction, ip_check_var in check_vars:
-        if var.get():
-            if sanction['Account ID'] not in selected_ids:
-                sanction['IP Prüfen'] = 'Ja' if ip_check_var.get() else 'Nein'
-                selected_sanctions.append(sanction)
-                selected_ids.add(sanction['Account ID'])
-    selected_sanctions.extend(combined_sanctions)  # Füge kombinierte Sanktionen hinzu
+    selected_sanctions = collect_selected_sanctions()
     if not selected_sanctions:
         messagebox.showinfo("Keine Auswahl", "Es wurden keine Sanktionen ausgewählt.")
         return
-    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[('CSV files', '*.csv'), ('All files', '*.*')])
+    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=EXPORT_FILETYPES)
     if file_path:
         export_sanctions(selected_sanctions, file_path)
 
 def export_sanctions(sanctions, file_path):
-    # Verwende defaultdict, um Sanktionen pro Account ID zu sammeln
-    combined_sanctions = defaultdict(lambda: {
-        'Regelverstoß': set(),
-        'Socialclubs': set(),
-        'Sanktion': None,
-        'Benutzername': None,
-        'IP Prüfen': 'Nein',
-        'Level': 'Unbekannt'
-    })
-
-    # Sammle alle Informationen pro Account ID
-    for sanction in sanctions:
-        account_id = sanction['Account ID']
-        combined_sanctions[account_id]['Benutzername'] = sanction['Benutzername']
-        combined_sanctions[account_id]['Regelverstoß'].add(sanction['Regelverstoß'])
-        combined_sanctions[account_id]['Socialclubs'].add(sanction['Socialclubs'])
-
-        # Kombiniere Sanktionen mit der richtigen Formatierung
-        if combined_sanctions[account_id]['Sanktion']:
-            combined_sanctions[account_id]['Sanktion'] = combine_sanction_sets(
-                combined_sanctions[account_id]['Sanktion'], sanction['Sanktion']
-            )
-        else:
-            combined_sanctions[account_id]['Sanktion'] = sanction['Sanktion']
-
-        # Setze "IP Prüfen" auf "Ja", wenn das Kontrollkästchen aktiviert ist
-        if sanction.get('IP Prüfen') == 'Ja':
-            combined_sanctions[account_id]['IP Prüfen'] = 'Ja'
-
-        # Bestimme das Level
-        logins = sanction.get('total_logins', 0)
-        combined_sanctions[account_id]['Level'] = determine_level(logins)
+    def exported(count):
+        log_action(f"Sanktionen in {file_path} exportiert")
+        messagebox.showinfo("Erfolg", f"Sanktionen in {file_path} exportiert.")
 
-    # Schreibe die kombinierten Sanktionen in die CSV-Datei
-    with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Regelverstoß', 'Account ID', 'Benutzername', 'Socialclubs', 'Sanktion', 'IP Prüfen', 'Level']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+    run_export_in_background(sanctions, file_path, exported)
 
-        for account_id, sanction_data in combined_sanctions.items():
-            writer.writerow({
-                'Regelverstoß': ', '.join(sanction_data['Regelverstoß']),
-                'Account ID': account_id,
-                'Benutzername': sanction_data['Benutzername'],
-                'Socialclubs': ', '.join(sanction_data['Socialclubs']),
-                'Sanktion': sanction_data['Sanktion'],
-                'IP Prüfen': sanction_data['IP Prüfen'],
-                'Level': sanction_data['Level']
-            })
+def select_all_sanctions(sanctions_1_1, sanctions_1_4, combined_sanctions):
+    # Entspricht einem Submit, bei dem alle Sanktionen ausgewählt sind
+    selected_sanctions = []
+    selected_ids = set()
+    for sanctions in (sanctions_1_1, *sanctions_1_4.values(), combined_sanctions):
+        for sanction in sanctions:
+            if sanction['Account ID'] not in selected_ids:
+                selected_sanctions.append(sanction)
+                selected_ids.add(sanction['Account ID'])
+    selected_sanctions.extend(combined_sanctions)
+    return selected_sanctions
 
-    log_action(f"Sanktionen in {file_path} exportiert")
-    messagebox.showinfo("Erfolg", f"Sanktionen in {file_path} exportiert.")
+def run_headless(input_paths, output_path, clusters_path=None, record=False):
+    global submitted
+    start = time.perf_counter()
+    try:
+        cache = snapshot_cache()
+        state = open_acp_state(input_paths, cache)
+        results = state.refresh()
+        # Erst abgleichen, dann sichern, damit der Snapshot den Datenbankstand kennt
+        database = open_database()
+        sync_database(database, state)
+        save_acp_state(state, cache)
+        submitted = open_submitted()
+        sanctions_1_1, sanctions_1_4, combined_sanctions = delta_results(results)
+        selected_sanctions = select_all_sanctions(sanctions_1_1, sanctions_1_4, combined_sanctions)
+        write_sanctions(selected_sanctions, output_path)
+        if database is not None:
+            # Ein Export ist noch kein Absenden; nur mit --record in Historie und Delta-Abgleich übernehmen
+            if record:
+                database.record_sanctions(selected_sanctions)
+            database.close()
+        if record:
+            record_submitted(selected_sanctions)
+        if clusters_path:
+            write_clusters_csv(state.active_index().clusters_summary(), clusters_path)
+    except Exception as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        log_action(f"Fehler aufgetreten: {e}", flush=True)
+        return 1
+    elapsed = time.perf_counter() - start
+    account_names, socialclub_names, _ = active_rules().section_names()
+    print(
+        f"{account_names} Verstöße: {len(sanctions_1_1)}, "
+        f"{socialclub_names} Verstöße: {sum(len(v) for v in sanctions_1_4.values())}, "
+        f"Kombinierte Verstöße: {len(combined_sanctions)} -> {output_path} ({elapsed:.2f}s)"
+    )
+    log_action(
+        f"Headless-Lauf: {'neue und verschärfte ' if delta_mode() else ''}Sanktionen aus {state.file_path} "
+        f"in {output_path} exportiert (Zeitraum: {window_label(state.window_days)})"
+    )
+    metrics.report("Headless-Lauf")
+    return 0
 
-try:
-    with open('acp_data.txt', 'r') as file:
-        acp_data = file.read()
-    accounts = parse_acp_data(acp_data)
-    sanctions_1_1_data, sanctions_1_4_data, combined_sanctions_data = check_sanctions(accounts)
+def run_gui(input_paths):
+    global acp_state, database, submitted
+    load_tk()
+    cache = snapshot_cache()
 
-    if sanctions_1_1_data or sanctions_1_4_data or combined_sanctions_data:
-        log_action("GUI zur Auswahl der Sanktionen gestartet")
-        show_gui_and_select_sanctions(sanctions_1_1_data, sanctions_1_4_data, combined_sanctions_data)
+    try:
+        # Unveränderte Daten kommen direkt aus dem Snapshot, angehängte Zeilen und neue Dateien werden nachgelesen
+        acp_state = open_acp_state(input_paths, cache)
+        results = acp_state.refresh()
+        database = open_database()
+        sync_database(database, acp_state)
+        save_acp_state(acp_state, cache)
+        submitted = open_submitted()
+        sanctions_1_1_data, sanctions_1_4_data, combined_sanctions_data = delta_results(results)
+
+        if sanctions_1_1_data or sanctions_1_4_data or combined_sanctions_data:
+            log_action("GUI zur Auswahl der Sanktionen gestartet")
+            show_gui_and_select_sanctions(sanctions_1_1_data, sanctions_1_4_data, combined_sanctions_data)
+            # Stand nach "Daten neu laden" für den nächsten Start sichern
+            if wait_for_reload():
+                save_acp_state(acp_state, cache)
+        elif delta_mode():
+            messagebox.showinfo("Information", "Keine neuen oder verschärften Regelbrüche seit dem letzten Absenden.")
+            log_action("Keine neuen oder verschärften Regelbrüche festgestellt")
+        else:
+            messagebox.showinfo("Information", "Keine Regelbrüche festgestellt.")
+            log_action("Keine Regelbrüche festgestellt")
+    except Exception as e:
+        messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten: {e}")
+        log_action(f"Fehler aufgetreten: {e}", flush=True)
+    if database is not None:
+        database.close()
+    return 0
+
+def run_lookup(account_id):
+    lookup_database = open_database()
+    if lookup_database is None:
+        print("Fehler: DatabasePath ist in der Konfiguration nicht gesetzt", file=sys.stderr)
+        return 1
+    print(f"Account ID: {account_id}")
+    socialclubs = lookup_database.socialclubs_for_account(account_id)
+    print(f"Socialclubs: {', '.join(socialclubs) or '-'}")
+    for socialclub in socialclubs:
+        others = [other for other in lookup_database.accounts_for_socialclub(socialclub) if other != account_id]
+        if others:
+            print(f"  {socialclub} auch genutzt von: {', '.join(others)}")
+    if lookup_database.was_sanctioned(account_id):
+        for submitted_at, rule, sanction_text in lookup_database.sanction_history(account_id):
+            print(f"{submitted_at}: {sanction_text} ({rule})")
     else:
-        messagebox.showinfo("Information", "Keine Regelbrüche festgestellt.")
-        log_action("Keine Regelbrüche festgestellt")
-except Exception as e:
-    messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten: {e}")
-    log_action(f"Fehler aufgetreten: {e}")
+        print("Bisher nicht sanktioniert")
+    lookup_database.close()
+    return 0
+
+def run_candidates():
+    # Regelkandidaten direkt per SQL aus der Datenbank, ohne die ACP-Dateien einzulesen (Stand des letzten Abgleichs)
+    candidate_database = open_database()
+    if candidate_database is None:
+        print("Fehler: DatabasePath ist in der Konfiguration nicht gesetzt", file=sys.stderr)
+        return 1
+    days = config['DEFAULT'].getint('WindowDays', 0)
+    since = candidate_database.window_start(days) if days else None
+    print(f"Zeitraum: {window_label(days)}")
+    for rule in active_rules().rules:
+        candidates = candidate_database.rule_candidates(rule, since)
+        kind = "Accounts" if rule.group == 'account' else "Socialclubs"
+        print(f"{rule.violation}: {len(candidates)} {kind}")
+        for candidate in candidates:
+            print(f"  {candidate}")
+    candidate_database.close()
+    return 0
+
+class QueryIndex:
+    """
+    Unveränderlicher Abfragestand für den Abfragedienst: Account -> Socialclubs, Socialclub -> Accounts
+    und Account -> Sanktionen als Dicts. Nach einem Reload wird ein neuer QueryIndex gebaut und ausgetauscht;
+    laufende Anfragen arbeiten mit dem Stand weiter, den sie zu Beginn gelesen haben.
+    """
+
+    SANCTION_FIELDS = ('Regelverstoß', 'Sanktion', 'Socialclubs', 'Cluster')
+
+    def __init__(self, state, results):
+        index = state.active_index()
+        # Kopien, da refresh() die Maps des SanctionIndex beim Nachladen verändert
+        self.account_socialclubs = {account_id: sorted(socialclubs) for account_id, socialclubs in index.account_map.items()}
+        self.socialclub_accounts = {socialclub: sorted(account_ids) for socialclub, account_ids in index.socialclub_to_account_ids.items()}
+        self.usernames = {account_id: info[0] for account_id, info in index.account_info.items()}
+        self.account_sanctions = defaultdict(list)
+        sanctions_1_1, sanctions_1_4, combined_sanctions = results
+        for sanction in chain(sanctions_1_1, chain.from_iterable(sanctions_1_4.values()), combined_sanctions):
+            entry = {field: sanction.get(field, '') for field in self.SANCTION_FIELDS}
+            entry['Level'] = determine_level(sanction.get('total_logins', 0))
+            self.account_sanctions[sanction['Account ID']].append(entry)
+        self.account_sanctions = dict(self.account_sanctions)
+        self.status = {
+            'files': state.input_paths,
+            'window_days': state.window_days,
+            'accounts': len(self.account_socialclubs),
+            'socialclubs': len(self.socialclub_accounts),
+            'sanctioned_accounts': len(self.account_sanctions),
+            'loaded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def account(self, account_id):
+        socialclubs = self.account_socialclubs.get(account_id)
+        if socialclubs is None:
+            return None
+        return {
+            'account_id': account_id,
+            'username': self.usernames.get(account_id, ''),
+            'socialclubs': socialclubs,
+            'sanctions': self.account_sanctions.get(account_id, []),
+        }
+
+    def socialclub(self, socialclub):
+        account_ids = self.socialclub_accounts.get(socialclub)
+        if account_ids is None:
+            return None
+        return {'socialclub': socialclub, 'accounts': account_ids}
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # GET /account/<Account ID>, GET /socialclub/<Socialclub>, GET /status; nur lesend
+    server_version = 'LogTool'
+
+    def do_GET(self):
+        # Einmal lesen: ein gleichzeitiger Austausch nach einem Reload betrifft erst die nächste Anfrage
+        query_index = self.server.query_index
+        parts = [unquote(part) for part in urlsplit(self.path).path.split('/') if part]
+        if parts == ['status']:
+            self.send_json(200, query_index.status)
+            return
+        if len(parts) == 2 and parts[0] in ('account', 'socialclub'):
+            result = query_index.account(parts[1]) if parts[0] == 'account' else query_index.socialclub(parts[1])
+            if result is not None:
+                self.send_json(200, result)
+            else:
+                self.send_json(404, {'error': f"{parts[0]} {parts[1]} nicht gefunden"})
+            return
+        self.send_json(404, {'error': "Unbekannte Abfrage; erlaubt sind /account/<ID>, /socialclub/<Name> und /status"})
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keine Zeile pro Anfrage im Terminal oder im Aktionslog
+        pass
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def run_service(input_paths, address):
+    # Lokaler Abfragedienst: einmal einlesen, danach regelmäßig nachladen und den Abfragestand austauschen
+    cache = snapshot_cache()
+    try:
+        host, port = parse_address(address)
+        state = open_acp_state(input_paths, cache)
+        results = state.refresh()
+        save_acp_state(state, cache)
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+    except Exception as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        log_action(f"Fehler aufgetreten: {e}", flush=True)
+        return 1
+    server.daemon_threads = True
+    server.query_index = QueryIndex(state, results)
+    stop = threading.Event()
+    interval = max(config['DEFAULT'].getint('ServeReloadSeconds', 60), 1)
+
+    def reloader():
+        while not stop.wait(interval):
+            try:
+                signature = state.source_signature()
+                results = state.refresh()
+                if state.source_signature() != signature:
+                    server.query_index = QueryIndex(state, results)
+                    save_acp_state(state, cache)
+                    log_action("Abfragedienst: Daten neu eingelesen")
+            except Exception as e:
+                # Bei Fehlern bleibt der bisherige Stand abfragbar
+                log_action(f"Abfragedienst: Neu laden fehlgeschlagen: {e}", flush=True)
+
+    def terminate(signum, frame):
+        # shutdown() wartet auf serve_forever() und darf daher nicht im selben (Haupt-)Thread laufen
+        threading.Thread(target=server.shutdown, name='LogTool-ServiceShutdown', daemon=True).start()
+
+    reload_thread = threading.Thread(target=reloader, name='LogTool-ServiceReload', daemon=True)
+    reload_thread.start()
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, terminate)
+    print(f"Abfragedienst läuft auf http://{host}:{server.server_address[1]}/ (Strg+C beendet)")
+    log_action(f"Abfragedienst auf {host}:{server.server_address[1]} gestartet")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+        stop.set()
+        server.server_close()
+        reload_thread.join()
+    log_action("Abfragedienst beendet", flush=True)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prüft ACP-Daten auf Verstöße gegen die Regeln aus der Regeldatei (Standard: §1.1 und §1.4).")
+    parser.add_argument('--headless', action='store_true', help="ohne GUI alle Sanktionen direkt als CSV exportieren")
+    parser.add_argument('-i', '--input', nargs='+', default=['acp_data.txt'], metavar='DATEI', help="ACP-Dateien oder Globs, auch .gz/.xz, in Einlesereihenfolge (Standard: acp_data.txt)")
+    parser.add_argument('-o', '--output', help="Zieldatei im Headless-Modus, .csv oder .jsonl, optional mit .gz (Standard: DefaultExportPath aus der Konfiguration)")
+    parser.add_argument('--clusters', help="im Headless-Modus zusätzlich die Account-Ringe als CSV schreiben")
+    parser.add_argument('--record', action='store_true', help="im Headless-Modus die exportierten Sanktionen als abgeschickt vermerken (Sanktionshistorie und Delta-Modus)")
+    parser.add_argument('--serve', nargs='?', const='', metavar='[HOST:]PORT', help="lokalen HTTP/JSON-Abfragedienst starten (Standard: ServeAddress aus der Konfiguration, 127.0.0.1:8765)")
+    parser.add_argument('--lookup', metavar='ACCOUNT_ID', help="Socialclubs und Sanktionshistorie eines Accounts aus der Datenbank ausgeben")
+    parser.add_argument('--candidates', action='store_true', help="Accounts und Socialclubs, die eine Regelschwelle erreichen, per SQL aus der Datenbank ausgeben")
+    parser.add_argument('--metrics', metavar='DATEI', help="Laufzeiten, Zähler und Speicher-Höchststand als JSON in DATEI schreiben (wie Metrics/MetricsFile in der Konfiguration)")
+    parser.add_argument('--window', type=int, metavar='TAGE', help="nur Logins der letzten TAGE Tage auswerten, gemessen am neuesten Login (Standard: WindowDays aus der Konfiguration, 0 = alle)")
+    parser.add_argument('--delta', action='store_true', help="nur Sanktionen anzeigen/exportieren, die seit dem letzten Absenden neu oder verschärft sind (wie DeltaMode in der Konfiguration)")
+    parser.add_argument('--rules', metavar='DATEI', help="Regeldatei (Standard: RulesFile aus der Konfiguration, sonst rules.ini)")
+    parser.add_argument('-c', '--config', default='config.ini', help="Konfigurationsdatei (Standard: config.ini)")
+    args = parser.parse_args(argv)
+
+    load_config(args.config)
+    configure_metrics()
+    try:
+        load_rules(args.rules or config['DEFAULT'].get('RulesFile', 'rules.ini'))
+    except (ValueError, configparser.Error) as e:
+        print(f"Fehler in der Regeldatei: {e}", file=sys.stderr)
+        log_action(f"Regeldatei fehlerhaft: {e}", flush=True)
+        return 1
+    if args.metrics:
+        metrics.enabled = True
+        metrics.file_path = args.metrics
+    if args.window is not None:
+        config['DEFAULT']['WindowDays'] = str(args.window)
+    if args.delta:
+        config['DEFAULT']['DeltaMode'] = 'yes'
+    if args.lookup:
+        return run_lookup(args.lookup)
+    if args.candidates:
+        return run_candidates()
+    if args.serve is not None:
+        return run_service(args.input, args.serve or config['DEFAULT'].get('ServeAddress', '127.0.0.1:8765'))
+    if args.headless:
+        return run_headless(args.input, args.output or config['DEFAULT']['DefaultExportPath'], args.clusters, args.record)
+    return run_gui(args.input)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Benchmark für LogTool: erzeugt synthetische ACP-Dateien und misst die einzelnen Verarbeitungsschritte.
+
+    python benchmark.py                                  # 10k und 1M Zeilen, Vergleich mit benchmark_baseline.json
+    python benchmark.py --sizes 10k,1m,10m --save-baseline
+    python benchmark.py --sizes 1m --share-1-1 0.05 --ring-size 3-12 --gui
+    python benchmark.py --backend python                 # ohne NumPy messen; Ergebnis muss zur Baseline passen
+
+Die erzeugten Dateien werden im Datenverzeichnis zwischengespeichert und bei gleichen Parametern wiederverwendet.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import LogTool
+
+DEFAULT_SIZES = '10k,1m'
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+STAGES = ('read_parse', 'check', 'export', 'refresh_gui')
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = 1
+    if text.endswith('k'):
+        factor, text = 1000, text[:-1]
+    elif text.endswith('m'):
+        factor, text = 1000000, text[:-1]
+    return int(float(text) * factor)
+
+def parse_ring_size(text):
+    low, _, high = text.partition('-')
+    low = int(low)
+    high = int(high) if high else low
+    if low < 2 or high < low:
+        raise argparse.ArgumentTypeError("Ringgröße muss als MIN-MAX mit 2 <= MIN <= MAX angegeben werden")
+    return low, high
+
+def generate_acp_file(file_path, line_count, share_1_1=0.02, share_1_4=0.02, ring_size=(3, 6), seed=1):
+    """
+    Schreibt line_count Zeilen im ACP-Format (11 Tokens pro Zeile) nach file_path.
+
+    Pro Gruppe wird zufällig entschieden:
+      share_1_1: ein Account nutzt zusätzlich den Socialclub anderer Accounts (§1.1, ggf. mit §1.4)
+      share_1_4: ein Ring aus ring_size Accounts teilt sich einen Socialclub (§1.4 ab drei Accounts)
+      sonst:     ein normaler Spieler mit eigenem Socialclub
+    Ein kleiner Teil der Zeilen ist doppelt oder unvollständig (weniger als 11 Tokens).
+    """
+    rng = random.Random(seed)
+    next_id = 100000
+    written = 0
+
+    def login_lines(account_id, socialclubs):
+        # Das ACP listet jeden Account einmal pro Socialclub; mehrfache Exporte erzeugen Dubletten
+        username = f"Spieler_{account_id}"
+        for socialclub in socialclubs:
+            date = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2024 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+            line = f"{username} {account_id} | {socialclub} {date} | (Page:{rng.randint(1, 40)}) (Total Logins: {rng.randint(1, 500)})\n"
+            yield line
+            if rng.random() < 0.03:
+                yield line
+        if rng.random() < 0.01:
+            yield f"{username} {account_id} | unvollständig\n"
+
+    with open(file_path, 'w', encoding=LogTool.ACP_ENCODING, buffering=1 << 20) as file:
+        while written < line_count:
+            kind = rng.random()
+            if kind < share_1_1:
+                # Mit mindestens zwei weiteren Accounts am fremden Socialclub kommt §1.4 hinzu (kombinierte Sanktion)
+                others = rng.randint(1, ring_size[1])
+                shared = f"SC_{next_id + 1}"
+                groups = [(next_id, [f"SC_{next_id}", shared])] + [(next_id + 1 + i, [shared]) for i in range(others)]
+                next_id += others + 1
+            elif kind < share_1_1 + share_1_4:
+                members = rng.randint(*ring_size)
+                shared = f"SC_{next_id}"
+                groups = [(next_id + i, [shared]) for i in range(members)]
+                next_id += members
+            else:
+                groups = [(next_id, [f"SC_{next_id}"])]
+                next_id += 1
+            for account_id, socialclubs in groups:
+                lines = list(login_lines(account_id, socialclubs))[:line_count - written]
+                file.writelines(lines)
+                written += len(lines)
+    return written
+
+def data_file(data_dir, line_count, args):
+    key = f"{line_count}:{args.share_1_1}:{args.share_1_4}:{args.ring_size}:{args.seed}"
+    file_path = os.path.join(data_dir, f"acp_{line_count}_{hashlib.blake2b(key.encode(), digest_size=6).hexdigest()}.txt")
+    if not os.path.exists(file_path):
+        print(f"Erzeuge {file_path} ({line_count} Zeilen) ...", flush=True)
+        generate_acp_file(file_path + '.tmp', line_count, args.share_1_1, args.share_1_4, args.ring_size, args.seed)
+        os.replace(file_path + '.tmp', file_path)
+    return file_path
+
+def result_digest(sanctions_1_1, sanctions_1_4, combined_sanctions):
+    # Reihenfolgeunabhängiger Fingerabdruck der Ergebnisse, um geänderte Sanktionen zu erkennen
+    hasher = hashlib.blake2b(digest_size=16)
+    sections = (('1_1', sanctions_1_1), ('1_4', [s for sanctions in sanctions_1_4.values() for s in sanctions]), ('combined', combined_sanctions))
+    for section, sanctions in sections:
+        # Die Socialclubs eines Accounts stammen aus einem Set, ihre Reihenfolge ist daher nicht stabil
+        for line in sorted(f"{section}|{s['Account ID']}|{sorted(s['Socialclubs'].split(', '))}|{s['Sanktion']}" for s in sanctions):
+            hasher.update(line.encode('utf-8') + b'\n')
+    return hasher.hexdigest()
+
+def build_gui_rows(results, gui):
+    # Entspricht refresh_gui(); ohne --gui nur Zeilen und Suchindex, ohne Treeview
+    LogTool.sanctions_1_1, LogTool.sanctions_1_4, LogTool.combined_sanctions = results
+    LogTool.row_state = {}
+    if gui:
+        LogTool.refresh_gui()
+        LogTool.root.update_idletasks()
+    else:
+        LogTool.build_rows()
+        LogTool.build_filter_index()
+
+def setup_gui():
+    LogTool.load_tk()
+    LogTool.root = LogTool.tk.Tk()
+    LogTool.root.withdraw()
+    LogTool.tree = LogTool.ttk.Treeview(LogTool.root, columns=('selected', 'rule', 'info', 'ip_check', 'level', 'cluster'))
+    LogTool.live_filter = LogTool.tk.StringVar()
+    LogTool.active_filters = []
+
+class StageMetrics(LogTool.RunMetrics):
+    """RunMetrics, die bei Bedarf zusätzlich die tracemalloc-Speicherspitze jedes Schritts festhalten."""
+
+    def __init__(self, measure_memory):
+        super().__init__()
+        self.enabled = True
+        self.measure_memory = measure_memory
+        self.memory_peaks = {}
+
+    @contextmanager
+    def stage(self, name):
+        with super().stage(name):
+            if not self.measure_memory:
+                yield
+                return
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                yield
+            finally:
+                peak = (tracemalloc.get_traced_memory()[1] - before) / (1 << 20)
+                self.memory_peaks[name] = max(self.memory_peaks.get(name, 0.0), peak)
+
+def refresh_stages(file_path, measure_memory):
+    """
+    Liest die Datei wie GUI und Headless-Lauf über AcpIngestState.refresh() ein (ohne Snapshot).
+    read_parse ist der gleichnamige Schritt aus den Laufzeitmetriken, check der Rest von refresh()
+    (Gruppieren, Prüfung, kombinierte Sanktionen, Ergebnis aufbereiten).
+    """
+    stage_metrics = StageMetrics(measure_memory)
+    previous, LogTool.metrics = LogTool.metrics, stage_metrics
+    try:
+        state = LogTool.AcpIngestState(file_path, workers=LogTool.parser_workers())
+        start = time.perf_counter()
+        results = state.refresh()
+        total = time.perf_counter() - start
+    finally:
+        LogTool.metrics = previous
+    if measure_memory:
+        peaks = stage_metrics.memory_peaks
+        figures = {
+            'read_parse': peaks.get('read_parse', 0.0),
+            'check': max((peak for name, peak in peaks.items() if name != 'read_parse'), default=0.0),
+        }
+    else:
+        read_parse = stage_metrics.stages.get('read_parse', 0.0)
+        figures = {'read_parse': read_parse, 'check': total - read_parse}
+    return figures, state, results
+
+def run_stages(file_path, export_path, gui, measure_memory):
+    """Führt alle Schritte einmal aus; liefert Zeiten (bzw. Speicherspitzen in MB) und die Ergebnisse."""
+    figures, state, results = refresh_stages(file_path, measure_memory)
+
+    def export():
+        LogTool.write_sanctions(LogTool.select_all_sanctions(*results), export_path)
+
+    def gui_build():
+        build_gui_rows(results, gui)
+
+    for stage, function in (('export', export), ('refresh_gui', gui_build)):
+        if measure_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            function()
+            figures[stage] = (tracemalloc.get_traced_memory()[1] - before) / (1 << 20)
+        else:
+            start = time.perf_counter()
+            function()
+            figures[stage] = time.perf_counter() - start
+    return figures, state.seen_entries, results
+
+def benchmark_size(line_count, args):
+    file_path = data_file(args.data_dir, line_count, args)
+    export_path = os.path.join(args.data_dir, 'benchmark_export.csv')
+    print(f"\n{line_count} Zeilen ({os.path.getsize(file_path) / (1 << 20):.1f} MB)", flush=True)
+
+    best = None
+    for _ in range(args.repeat):
+        seconds, accounts, results = run_stages(file_path, export_path, args.gui, measure_memory=False)
+        best = seconds if best is None else {stage: min(best[stage], seconds[stage]) for stage in STAGES}
+
+    peak_mb = None
+    if args.memory:
+        # Eigener Durchlauf, da tracemalloc die Laufzeit deutlich verfälscht
+        del accounts, results
+        tracemalloc.start()
+        peak_mb, accounts, results = run_stages(file_path, export_path, args.gui, measure_memory=True)
+        tracemalloc.stop()
+
+    sanctions_1_1, sanctions_1_4, combined_sanctions = results
+    os.remove(export_path)
+    return {
+        'seconds': best,
+        'peak_mb': peak_mb,
+        'accounts': len(accounts),
+        'sanctions_1_1': len(sanctions_1_1),
+        'sanctions_1_4': sum(len(sanctions) for sanctions in sanctions_1_4.values()),
+        'combined': len(combined_sanctions),
+        'digest': result_digest(sanctions_1_1, sanctions_1_4, combined_sanctions),
+    }
+
+def compare(report, baseline, tolerance):
+    """Gibt die Ergebnisse neben der Baseline aus; liefert False bei Regressionen oder geänderten Ergebnissen."""
+    ok = True
+    for size, result in report['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size) if baseline else None
+        print(f"\n{size} Zeilen: {result['accounts']} Accounts, {result['sanctions_1_1']} x §1.1, "
+              f"{result['sanctions_1_4']} x §1.4, {result['combined']} kombiniert")
+        if previous is not None and previous['digest'] != result['digest']:
+            print("  ERGEBNIS WEICHT VON DER BASELINE AB")
+            ok = False
+        print(f"  {'Schritt':<16}{'Sekunden':>10}{'Baseline':>10}{'Faktor':>8}{'Peak MB':>10}")
+        for stage in STAGES:
+            seconds = result['seconds'][stage]
+            slower = False
+            line = f"  {stage:<16}{seconds:>10.3f}"
+            if previous is not None and stage in previous['seconds']:
+                ratio = seconds / max(previous['seconds'][stage], 1e-9)
+                line += f"{previous['seconds'][stage]:>10.3f}{ratio:>8.2f}"
+                # Sehr kurze Schritte schwanken zu stark für einen sinnvollen Vergleich
+                slower = ratio > 1 + tolerance and seconds > 0.05
+            else:
+                line += f"{'-':>10}{'-':>8}"
+            line += f"{result['peak_mb'][stage]:>10.1f}" if result['peak_mb'] is not None else f"{'-':>10}"
+            if slower:
+                line += "  LANGSAMER"
+                ok = False
+            print(line)
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Misst Einlesen, Prüfung, Export und GUI-Aufbau von LogTool mit synthetischen ACP-Daten.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Zeilenanzahl, kommagetrennt, z.B. 10k,1m,10m (Standard: {DEFAULT_SIZES})")
+    parser.add_argument('--share-1-1', type=float, default=0.02, help="Anteil der Gruppen mit §1.1-Verstoß (Standard: 0.02)")
+    parser.add_argument('--share-1-4', type=float, default=0.02, help="Anteil der Gruppen, die einen Ring bilden (Standard: 0.02)")
+    parser.add_argument('--ring-size', type=parse_ring_size, default=(3, 6), metavar='MIN-MAX', help="Accounts pro Ring (Standard: 3-6)")
+    parser.add_argument('--seed', type=int, default=1, help="Startwert des Zufallsgenerators (Standard: 1)")
+    parser.add_argument('--repeat', type=int, default=1, help="Durchläufe pro Größe, gewertet wird der schnellste (Standard: 1)")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="keinen zusätzlichen Durchlauf zur Speichermessung")
+    parser.add_argument('--gui', action='store_true', help="refresh_gui() mit echtem Treeview messen (braucht ein Display)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'logtool_benchmark'), help="Verzeichnis für die erzeugten ACP-Dateien")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f"Baseline-Datei (Standard: {DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Ergebnis als neue Baseline speichern")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="erlaubte Verlangsamung gegenüber der Baseline (Standard: 0.2 = 20 %%)")
+    parser.add_argument('--backend', choices=('auto', 'python', 'numpy'), default='auto', help="SanctionBackend für die Prüfung (Standard: auto = NumPy, falls installiert)")
+    parser.add_argument('--json', help="Ergebnis zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    LogTool.config['DEFAULT']['SanctionBackend'] = args.backend
+    os.makedirs(args.data_dir, exist_ok=True)
+    if args.gui:
+        setup_gui()
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        # Nicht Teil von parameters: Läufe mit und ohne NumPy sollen gegen dieselbe Baseline verglichen werden
+        'backend': 'numpy' if LogTool.numpy_backend() else 'python',
+        'parameters': {'share_1_1': args.share_1_1, 'share_1_4': args.share_1_4, 'ring_size': list(args.ring_size), 'seed': args.seed, 'gui': args.gui},
+        'sizes': {},
+    }
+    for size in args.sizes.split(','):
+        report['sizes'][str(parse_size(size))] = benchmark_size(parse_size(size), args)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline.get('parameters') != report['parameters']:
+            print(f"\nHinweis: {args.baseline} wurde mit anderen Parametern erstellt, kein Vergleich möglich")
+            baseline = None
+    ok = compare(report, baseline, args.tolerance)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"\nBaseline in {args.baseline} gespeichert")
+        return 0
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# LogTool.py liegt im Wurzelverzeichnis des Repos und ist kein Paket
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Zweite Socialclub-Regel ohne MainSanction, für Tests mit eigenen Regelsätzen
+EXTRA_RULE = """
+[Rule §1.5]
+Title = Ring aus mehreren Accounts
+Group = socialclub
+Count = accounts
+MinCount = 3
+Sanction = Permanenter Bann
+ShowLogins = no
+Precedence = 3
+"""
+
+
+def acp_line(username, account_id, socialclub, login_date, logins, page=1):
+    return f"{username} {account_id} | {socialclub} {login_date} | (Page:{page}) (Total Logins: {logins})\n"
@@ -0,0 +1,50 @@
+import pytest
+
+import LogTool
+from benchmark import generate_acp_file
+from conftest import EXTRA_RULE
+
+pytest.importorskip('numpy')
+
+RULE_SETS = {
+    'default': LogTool.DEFAULT_RULES,
+    'extra_socialclub_rule': LogTool.DEFAULT_RULES + EXTRA_RULE,
+    'changed_thresholds': (
+        LogTool.DEFAULT_RULES
+        .replace('MinCount = 2', 'MinCount = 3')
+        .replace('RequireShared = yes', 'RequireShared = no')
+        .replace('Count = entries', 'Count = accounts')
+        .replace('ShowLogins = no', 'ShowLogins = yes')
+    ),
+    'no_main_sanction': LogTool.DEFAULT_RULES.replace('MainSanction = Hauptaccount Bann 60 Tage\n', ''),
+}
+
+
+@pytest.fixture(scope='module')
+def accounts(tmp_path_factory):
+    file_path = str(tmp_path_factory.mktemp('acp') / 'acp.txt')
+    generate_acp_file(file_path, 20000, share_1_1=0.05, share_1_4=0.05, ring_size=(3, 6), seed=7)
+    return list(LogTool.iter_acp_file(file_path))
+
+
+def check_with_backend(monkeypatch, accounts, rules_text, backend):
+    monkeypatch.setitem(LogTool.config['DEFAULT'], 'SanctionBackend', backend)
+    monkeypatch.setattr(LogTool, 'rules', LogTool.parse_rules(rules_text))
+    assert LogTool.numpy_backend() == (backend == 'numpy')
+    return LogTool.check_sanctions(accounts)
+
+
+@pytest.mark.parametrize('rules_name', sorted(RULE_SETS))
+def test_numpy_backend_matches_python(monkeypatch, accounts, rules_name):
+    python_results = check_with_backend(monkeypatch, accounts, RULE_SETS[rules_name], 'python')
+    numpy_results = check_with_backend(monkeypatch, accounts, RULE_SETS[rules_name], 'numpy')
+    assert numpy_results == python_results
+    assert any(python_results)
+
+
+def test_missing_numpy_falls_back_to_python(monkeypatch, accounts):
+    expected = check_with_backend(monkeypatch, accounts, LogTool.DEFAULT_RULES, 'python')
+    monkeypatch.setitem(LogTool.config['DEFAULT'], 'SanctionBackend', 'auto')
+    monkeypatch.setattr(LogTool, 'np', False)
+    assert not LogTool.numpy_backend()
+    assert LogTool.check_sanctions(accounts) == expected
@@ -0,0 +1,192 @@
+"""
+Regressionstest: check_sanctions gegen eine eingefrorene Kopie der ursprünglichen Implementierung
+(verschachtelte Schleifen für die Kombination, combine_sanctions per Textvergleich).
+"""
+from collections import defaultdict
+
+import pytest
+
+import LogTool
+from benchmark import generate_acp_file
+from conftest import acp_line
+
+
+def baseline_parse_acp_data(data):
+    seen_entries = {}
+    for line in data.strip().split('\n'):
+        parts = line.split()
+        if len(parts) < 11:
+            continue
+        total_logins = parts[-1].strip('Total Logins:').strip(')')
+        try:
+            total_logins = int(total_logins)
+        except ValueError:
+            total_logins = 0
+
+        key = (parts[0], parts[1], parts[3], parts[4] + ' ' + parts[5])
+
+        if key in seen_entries:
+            if seen_entries[key]['total_logins'] != total_logins:
+                seen_entries[key]['total_logins'] += total_logins
+        else:
+            seen_entries[key] = {
+                'username': parts[0],
+                'account_id': parts[1],
+                'socialclub': parts[3],
+                'login_date': parts[4] + ' ' + parts[5],
+                'first_login_page': parts[7].strip('Page:').strip('()'),
+                'total_logins': total_logins
+            }
+    return list(seen_entries.values())
+
+
+def baseline_check_sanctions(accounts):
+    account_map = defaultdict(set)
+    socialclub_map = defaultdict(list)
+    socialclub_to_account_ids = defaultdict(set)
+    sanctions_1_1 = {}
+    sanctions_1_4 = defaultdict(list)
+
+    for account in accounts:
+        account_map[account['account_id']].add(account['socialclub'])
+        socialclub_map[account['socialclub']].append(account)
+        socialclub_to_account_ids[account['socialclub']].add(account['account_id'])
+
+    for account_id, socialclubs in account_map.items():
+        if len(socialclubs) > 1:
+            for socialclub in socialclubs:
+                other_accounts = socialclub_to_account_ids[socialclub] - {account_id}
+                if other_accounts:
+                    sanctions_1_1[account_id] = {
+                        'Regelverstoß': '§1.1 - Mehrere Social Clubs für einen Account',
+                        'Account ID': account_id,
+                        'Benutzername': accounts[0]['username'],
+                        'Socialclubs': ', '.join(socialclubs),
+                        'Sanktion': 'Permanenter Bann',
+                        'total_logins': account['total_logins']
+                    }
+                    break
+
+    for socialclub, accounts in socialclub_map.items():
+        if len(accounts) > 2:
+            accounts_sorted_by_logins = sorted(accounts, key=lambda x: x['total_logins'], reverse=True)
+            main_account_id = accounts_sorted_by_logins[0]['account_id']
+            for acc in accounts:
+                if acc['account_id'] == main_account_id:
+                    sanction_text = f'Hauptaccount Bann 60 Tage (Logins: {acc["total_logins"]})'
+                else:
+                    sanction_text = f'Permanenter Bann (Logins: {acc["total_logins"]})'
+                sanctions_1_4[socialclub].append({
+                    'Regelverstoß': '§1.4 - Mehrere Accounts mit einem Social Club',
+                    'Account ID': acc['account_id'],
+                    'Benutzername': acc['username'],
+                    'Socialclubs': acc['socialclub'],
+                    'Sanktion': sanction_text,
+                    'total_logins': acc['total_logins']
+                })
+
+    already_combined_ids = set()
+    combined_sanctions_map = {}
+
+    for account_id, sanction_1_1 in list(sanctions_1_1.items()):
+        for socialclub, sanctions in list(sanctions_1_4.items()):
+            for sanction_1_4 in sanctions:
+                if sanction_1_4['Account ID'] == account_id:
+                    combined_key = (account_id, sanction_1_1['Socialclubs'])
+                    if combined_key not in combined_sanctions_map:
+                        combined_sanctions_map[combined_key] = {
+                            'Regelverstoß': sanction_1_1['Regelverstoß'] + ' + ' + sanction_1_4['Regelverstoß'],
+                            'Account ID': account_id,
+                            'Benutzername': sanction_1_1['Benutzername'],
+                            'Socialclubs': sanction_1_1['Socialclubs'],
+                            'Sanktion': baseline_combine_sanctions(sanction_1_1['Sanktion'], sanction_1_4['Sanktion']),
+                            'total_logins': sanction_1_4['total_logins']
+                        }
+                    already_combined_ids.add(account_id)
+                    break
+
+    combined_sanctions = list(combined_sanctions_map.values())
+    sanctions_1_1 = [s for s in sanctions_1_1.values() if s['Account ID'] not in already_combined_ids]
+    return sanctions_1_1, sanctions_1_4, combined_sanctions
+
+
+def baseline_combine_sanctions(sanction_1_1, sanction_1_4):
+    if sanction_1_1 == sanction_1_4:
+        return sanction_1_1
+
+    if "Permanenter Bann" in sanction_1_1 and "Permanenter Bann" in sanction_1_4:
+        logins_1_1 = int(sanction_1_1.split("Logins:")[1].strip(')').strip()) if "Logins:" in sanction_1_1 else 0
+        logins_1_4 = int(sanction_1_4.split("Logins:")[1].strip(')').strip()) if "Logins:" in sanction_1_4 else 0
+        combined_logins = logins_1_1 + logins_1_4
+        return f'Permanenter Bann (Logins: {combined_logins})'
+
+    if "Hauptaccount Bann 60 Tage" in sanction_1_1 or "Hauptaccount Bann 60 Tage" in sanction_1_4:
+        return 'Permanenter Bann'
+
+    return "Permanenter Bann"
+
+
+# Benutzername und total_logins der §1.1-Einträge (und damit der Benutzername der Kombination) kamen
+# ursprünglich aus accounts[0] bzw. einer übrig gebliebenen Schleifenvariable; das ist bewusst behoben.
+# Cluster, label und priority sind neue interne Felder.
+IGNORED_1_1 = {'Benutzername', 'total_logins', 'Cluster', 'label', 'priority'}
+IGNORED_1_4 = {'Cluster', 'label', 'priority'}
+IGNORED_COMBINED = {'Benutzername', 'Cluster', 'label', 'priority'}
+
+
+def strip(sanctions, ignored):
+    return [{key: value for key, value in sanction.items() if key not in ignored} for sanction in sanctions]
+
+
+HAND_WRITTEN_DUMP = ''.join([
+    # Ring über SC_A: §1.4, Hauptaccount ist 1 (meiste Logins)
+    acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 50),
+    acp_line('beta', '2', 'SC_A', '01.03.2024 11:00:00', 10),
+    acp_line('gamma', '3', 'SC_A', '01.03.2024 12:00:00', 10),
+    # 2 nutzt zusätzlich SC_B, das auch 4 nutzt: §1.1 für 2 und 4, kombiniert für 2
+    acp_line('beta', '2', 'SC_B', '02.03.2024 10:00:00', 12),
+    acp_line('delta', '4', 'SC_B', '02.03.2024 11:00:00', 7),
+    acp_line('delta', '4', 'SC_C', '02.03.2024 12:00:00', 7),
+    # Dublette mit anderer Login-Zahl wird zusammengeführt, identische Dublette nicht
+    acp_line('gamma', '3', 'SC_A', '01.03.2024 12:00:00', 5),
+    acp_line('beta', '2', 'SC_A', '01.03.2024 11:00:00', 10),
+    # Gleichstand bei den Logins: der erste Eintrag ist Hauptaccount
+    acp_line('eps', '5', 'SC_D', '03.03.2024 10:00:00', 20),
+    acp_line('zeta', '6', 'SC_D', '03.03.2024 11:00:00', 20),
+    acp_line('eta', '7', 'SC_D', '03.03.2024 12:00:00', 20),
+    # Mehrere Login-Tage desselben Accounts zählen als eigene Einträge
+    acp_line('theta', '8', 'SC_E', '04.03.2024 10:00:00', 3),
+    acp_line('theta', '8', 'SC_E', '05.03.2024 10:00:00', 4),
+    acp_line('theta', '8', 'SC_E', '06.03.2024 10:00:00', 5),
+    # Zu kurze Zeile wird übersprungen
+    "kaputt 9 | SC_F\n",
+])
+
+
+@pytest.fixture(params=['hand_written', 'generated'])
+def dump(request, tmp_path):
+    if request.param == 'hand_written':
+        return HAND_WRITTEN_DUMP
+    file_path = str(tmp_path / 'acp.txt')
+    generate_acp_file(file_path, 20000, share_1_1=0.05, share_1_4=0.05, ring_size=(3, 6), seed=3)
+    # generate_acp_file schreibt wie das ACP in der Locale-Kodierung (unter Windows cp1252)
+    with open(file_path, encoding=LogTool.ACP_ENCODING) as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_check_sanctions_matches_baseline(monkeypatch, dump, backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    monkeypatch.setitem(LogTool.config['DEFAULT'], 'SanctionBackend', backend)
+    monkeypatch.setattr(LogTool, 'rules', LogTool.parse_rules(LogTool.DEFAULT_RULES))
+
+    expected_1_1, expected_1_4, expected_combined = baseline_check_sanctions(baseline_parse_acp_data(dump))
+    sanctions_1_1, sanctions_1_4, combined_sanctions = LogTool.check_sanctions(LogTool.parse_acp_data(dump))
+
+    assert expected_1_4 and expected_combined
+    assert strip(sanctions_1_1, IGNORED_1_1) == strip(expected_1_1, IGNORED_1_1)
+    assert list(sanctions_1_4) == list(expected_1_4)
+    for socialclub, sanctions in sanctions_1_4.items():
+        assert strip(sanctions, IGNORED_1_4) == strip(expected_1_4[socialclub], IGNORED_1_4)
+    assert strip(combined_sanctions, IGNORED_COMBINED) == strip(expected_combined, IGNORED_COMBINED)
@@ -0,0 +1,97 @@
+import pytest
+
+import LogTool
+from benchmark import generate_acp_file
+from conftest import EXTRA_RULE, acp_line
+
+
+def account_rows(database):
+    return sorted(database.connection.execute(
+        "SELECT username, account_id, socialclub, login_date, first_login_page, total_logins FROM accounts"
+    ))
+
+
+def test_appended_lines_are_upserted(tmp_path, monkeypatch):
+    acp_file = tmp_path / 'acp.txt'
+    acp_file.write_text(
+        acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 5)
+        + acp_line('beta', '2', 'SC_B', '02.03.2024 10:00:00', 3)
+    )
+    state = LogTool.AcpIngestState(str(acp_file))
+    state.refresh()
+    database = LogTool.SanctionDatabase(str(tmp_path / 'logtool.db'))
+    assert database.sync_accounts(state)
+
+    with acp_file.open('a') as file:
+        file.write(acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 7))
+        file.write(acp_line('gamma', '3', 'SC_A', '03.03.2024 10:00:00', 1))
+    state.refresh()
+
+    def full_reload(accounts):
+        raise AssertionError("Angehängte Zeilen dürfen kein komplettes Neuladen auslösen")
+
+    monkeypatch.setattr(database, 'load_accounts', full_reload)
+    assert database.sync_accounts(state)
+    assert not database.sync_accounts(state)
+    assert account_rows(database) == [
+        ('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 'Page:1', 12),
+        ('beta', '2', 'SC_B', '02.03.2024 10:00:00', 'Page:1', 3),
+        ('gamma', '3', 'SC_A', '03.03.2024 10:00:00', 'Page:1', 1),
+    ]
+    database.close()
+
+
+def test_rewritten_file_reloads_all_accounts(tmp_path):
+    acp_file = tmp_path / 'acp.txt'
+    acp_file.write_text(acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 5))
+    state = LogTool.AcpIngestState(str(acp_file))
+    state.refresh()
+    database = LogTool.SanctionDatabase(str(tmp_path / 'logtool.db'))
+    database.sync_accounts(state)
+
+    acp_file.write_text(acp_line('beta', '2', 'SC_B', '02.03.2024 10:00:00', 3))
+    state.refresh()
+    assert database.sync_accounts(state)
+    assert account_rows(database) == [('beta', '2', 'SC_B', '02.03.2024 10:00:00', 'Page:1', 3)]
+    database.close()
+
+
+def test_login_time_orders_by_date(tmp_path):
+    acp_file = tmp_path / 'acp.txt'
+    acp_file.write_text(
+        acp_line('alpha', '1', 'SC_A', '02.01.2024 10:00:00', 5)
+        + acp_line('beta', '2', 'SC_B', '01.02.2024 10:00:00', 3)
+        + acp_line('gamma', '3', 'SC_C', '15.01.2024 10:00:00', 1)
+    )
+    state = LogTool.AcpIngestState(str(acp_file))
+    state.refresh()
+    database = LogTool.SanctionDatabase(str(tmp_path / 'logtool.db'))
+    database.sync_accounts(state)
+    # Als Text sortiert käme der 01.02. vor dem 02.01.
+    assert [row[0] for row in database.connection.execute("SELECT account_id FROM accounts ORDER BY login_time")] == ['1', '3', '2']
+    database.close()
+
+
+@pytest.mark.parametrize('window_days', [0, 60])
+@pytest.mark.parametrize('rules_text', [LogTool.DEFAULT_RULES, LogTool.DEFAULT_RULES + EXTRA_RULE])
+def test_rule_candidates_match_evaluation(tmp_path, monkeypatch, rules_text, window_days):
+    rule_set = LogTool.parse_rules(rules_text)
+    monkeypatch.setattr(LogTool, 'rules', rule_set)
+    acp_file = str(tmp_path / 'acp.txt')
+    generate_acp_file(acp_file, 5000, share_1_1=0.05, share_1_4=0.05, ring_size=(2, 5), seed=11)
+    state = LogTool.AcpIngestState(acp_file)
+    state.set_window(window_days)
+    state.refresh()
+    index = state.active_index()
+    database = LogTool.SanctionDatabase(str(tmp_path / 'logtool.db'))
+    database.sync_accounts(state)
+
+    since = database.window_start(window_days) if window_days else None
+    for rule in rule_set.rules:
+        if rule.group == 'account':
+            expected = set(index.account_hits[rule.name])
+        else:
+            expected = set(index.socialclub_hits[rule.name])
+        assert expected
+        assert set(database.rule_candidates(rule, since)) == expected
+    database.close()
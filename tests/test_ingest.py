@@ -0,0 +1,121 @@
+import gzip
+import os
+import threading
+
+import pytest
+
+import LogTool
+from conftest import acp_line
+
+RING = (
+    acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 50)
+    + acp_line('beta', '2', 'SC_A', '02.03.2024 10:00:00', 10)
+    + acp_line('gamma', '3', 'SC_A', '03.03.2024 10:00:00', 5)
+)
+APPENDED = (
+    acp_line('beta', '2', 'SC_B', '04.03.2024 10:00:00', 7)
+    + acp_line('delta', '4', 'SC_B', '05.03.2024 10:00:00', 3)
+)
+
+
+def entries(state):
+    return sorted((key, account.total_logins) for key, account in state.seen_entries.items())
+
+
+def assert_matches_full_read(state, results, file_path):
+    fresh = LogTool.AcpIngestState(str(file_path))
+    assert results == fresh.refresh()
+    assert entries(state) == entries(fresh)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_last_line_without_newline_counts(tmp_path, compressed):
+    data = RING.rstrip('\n').encode(LogTool.ACP_ENCODING)
+    file_path = tmp_path / ('acp.txt.gz' if compressed else 'acp.txt')
+    file_path.write_bytes(gzip.compress(data) if compressed else data)
+
+    state = LogTool.AcpIngestState(str(file_path))
+    _, sanctions_1_4, _ = state.refresh()
+    assert len(state.seen_entries) == len(LogTool.parse_acp_data(RING.rstrip('\n'))) == 3
+    assert len(sanctions_1_4['SC_A']) == 3
+    # Unverändert erneut laden wertet die offene Zeile nicht doppelt aus
+    assert state.refresh()[1] == sanctions_1_4
+
+
+def test_tail_append_is_incremental(tmp_path):
+    file_path = tmp_path / 'acp.txt'
+    file_path.write_text(RING, encoding=LogTool.ACP_ENCODING)
+    state = LogTool.AcpIngestState(str(file_path))
+    state.refresh()
+    index = state.index
+
+    with open(file_path, 'a', encoding=LogTool.ACP_ENCODING) as file:
+        file.write(APPENDED)
+    results = state.refresh()
+    assert state.index is index
+    assert_matches_full_read(state, results, file_path)
+
+
+def test_merged_duplicate_in_tail(tmp_path):
+    # Die letzte Zeile ist eine Dublette mit anderer Login-Zahl und hat noch kein Zeilenende
+    file_path = tmp_path / 'acp.txt'
+    file_path.write_text(RING + acp_line('gamma', '3', 'SC_A', '03.03.2024 10:00:00', 8).rstrip('\n'),
+                         encoding=LogTool.ACP_ENCODING)
+    state = LogTool.AcpIngestState(str(file_path))
+    state.refresh()
+    index = state.index
+    assert state.seen_entries[('gamma', '3', 'SC_A', '03.03.2024 10:00:00')].total_logins == 13
+
+    with open(file_path, 'a', encoding=LogTool.ACP_ENCODING) as file:
+        file.write('\n' + APPENDED)
+    results = state.refresh()
+    assert state.index is index
+    assert state.seen_entries[('gamma', '3', 'SC_A', '03.03.2024 10:00:00')].total_logins == 13
+    assert_matches_full_read(state, results, file_path)
+
+
+@pytest.mark.parametrize('change', ['truncated', 'rotated', 'tail_continued'])
+def test_changed_file_is_read_again(tmp_path, change):
+    file_path = tmp_path / 'acp.txt'
+    # Bei tail_continued war die letzte Zeile beim ersten Lesen erst halb geschrieben (Logins 1 statt 12)
+    first = RING + APPENDED
+    if change == 'tail_continued':
+        first += acp_line('eps', '5', 'SC_B', '06.03.2024 10:00:00', 12)[:-3]
+    file_path.write_text(first, encoding=LogTool.ACP_ENCODING)
+    state = LogTool.AcpIngestState(str(file_path))
+    state.refresh()
+    index = state.index
+
+    if change == 'truncated':
+        file_path.write_text(RING, encoding=LogTool.ACP_ENCODING)
+    elif change == 'rotated':
+        rotated_path = tmp_path / 'acp.new'
+        rotated_path.write_text(APPENDED + RING, encoding=LogTool.ACP_ENCODING)
+        os.replace(rotated_path, file_path)
+    else:
+        with open(file_path, 'a', encoding=LogTool.ACP_ENCODING) as file:
+            file.write('2)\n')
+    results = state.refresh()
+    assert state.index is not index
+    assert_matches_full_read(state, results, file_path)
+
+
+def test_cancelled_rebuild_keeps_previous_state(tmp_path):
+    file_path = tmp_path / 'acp.txt'
+    file_path.write_text(RING + APPENDED, encoding=LogTool.ACP_ENCODING)
+    state = LogTool.AcpIngestState(str(file_path))
+    results = state.refresh()
+    index = state.index
+    before = entries(state)
+
+    # Gekürzt: erzwingt komplettes Einlesen, das sofort abgebrochen wird
+    file_path.write_text(APPENDED, encoding=LogTool.ACP_ENCODING)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(LogTool.ReloadCancelled):
+        state.refresh(cancel_event=cancel_event)
+    assert state.index is index
+    assert entries(state) == before
+    assert state.active_index().results() == results
+
+    assert_matches_full_read(state, state.refresh(), file_path)
@@ -0,0 +1,31 @@
+import LogTool
+from conftest import EXTRA_RULE, acp_line
+
+
+def evaluate(monkeypatch, text, rule_set, backend='python'):
+    monkeypatch.setitem(LogTool.config['DEFAULT'], 'SanctionBackend', backend)
+    index = LogTool.SanctionIndex(rule_set)
+    for account in LogTool.parse_acp_data(text):
+        index.add_account(account)
+    index.evaluate_all()
+    return index.results()
+
+
+def test_second_socialclub_rule_without_main_sanction(monkeypatch):
+    rule_set = LogTool.parse_rules(LogTool.DEFAULT_RULES + EXTRA_RULE)
+    text = (
+        acp_line('alpha', '1', 'SC_A', '01.03.2024 10:00:00', 50)
+        + acp_line('beta', '2', 'SC_A', '02.03.2024 10:00:00', 10)
+        + acp_line('gamma', '3', 'SC_A', '03.03.2024 10:00:00', 5)
+    )
+    _, sanctions_1_4, _ = evaluate(monkeypatch, text, rule_set)
+
+    by_rule = {}
+    for sanction in sanctions_1_4['SC_A']:
+        assert sanction['Sanktion'] is not None
+        assert sanction['priority'] > 0
+        by_rule.setdefault(sanction['Regelverstoß'].split(' - ')[0], {})[sanction['Account ID']] = sanction['label']
+
+    # Nur §1.4 hat eine MainSanction für den Account mit den meisten Logins
+    assert by_rule['§1.4'] == {'1': 'Hauptaccount Bann 60 Tage', '2': 'Permanenter Bann', '3': 'Permanenter Bann'}
+    assert by_rule['§1.5'] == {'1': 'Permanenter Bann', '2': 'Permanenter Bann', '3': 'Permanenter Bann'}